@@ -0,0 +1,66 @@
+import ast
+import json
+import tempfile
+import unittest
+from pathlib import Path
+
+from tools.apiindex import INDEX_VERSION, build_index, find_sites, load_index, query, save_index
+from tools.benchmark import DATA_DIR, load_pair
+
+
+def sites(source: str, *names: str) -> list[tuple[int, int, str, str]]:
+    return find_sites(ast.parse(source), set(names))
+
+
+class FindSitesTest(unittest.TestCase):
+    def test_call_and_reference(self):
+        self.assertEqual(
+            sites("get(url)\nf = get\n", "get"),
+            [(1, 0, "call", "get"), (2, 4, "reference", "get")],
+        )
+
+    def test_attribute_column(self):
+        # The column is the attribute's, not the start of requests.get.
+        self.assertEqual(sites("x = requests.get(url)\n", "get"), [(1, 13, "call", "get")])
+
+    def test_attribute_on_continuation_line(self):
+        source = "client = (\n    session\n    .fetch()\n)\n"
+        self.assertEqual(sites(source, "fetch"), [(3, 5, "call", "fetch")])
+
+    def test_import_positions(self):
+        source = "import os, yaml.loader\nfrom json import loads as l, dumps\n"
+        self.assertEqual(
+            sites(source, "yaml", "loader", "dumps"),
+            [(1, 11, "import", "loader"), (1, 11, "import", "yaml"), (2, 29, "import", "dumps")],
+        )
+
+
+class IndexTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "index.json"
+        self.index = build_index([load_pair(DATA_DIR / "238.json")])
+
+    def test_query(self):
+        found = query(self.index, "dataclass")
+        self.assertEqual(list(found), ["dataclasses"])
+        self.assertTrue(all(site[0] == "238" for site in found["dataclasses"]))
+        self.assertEqual(query(self.index, "dataclass", "attrs"), {})
+
+    def test_round_trip(self):
+        save_index(self.index, self.path)
+        self.assertEqual(load_index(self.path), self.index)
+
+    def test_rejects_other_version(self):
+        save_index({**self.index, "version": INDEX_VERSION + 1}, self.path)
+        with self.assertRaises(ValueError):
+            load_index(self.path)
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump({"apis": {}}, f)
+        with self.assertRaises(ValueError):
+            load_index(self.path)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,80 @@
+import ast
+import unittest
+
+from tools.astdiff import GAP_WINDOW, diff_trees
+
+
+def ops(old: str, new: str) -> list[tuple[str, str]]:
+    return [(op.kind, op.path) for op in diff_trees(ast.parse(old), ast.parse(new))]
+
+
+class DiffTreesTest(unittest.TestCase):
+    def test_identical(self):
+        self.assertEqual(ops("a()\nb()", "a()\nb()"), [])
+
+    def test_positions_are_ignored(self):
+        self.assertEqual(ops("a(1, 2)", "a(1,\n   2)"), [])
+
+    def test_moved_statement(self):
+        # a() and b() are anchors; c() is deleted after them and inserted before.
+        self.assertEqual(
+            ops("a()\nb()\nc()", "c()\na()\nb()"),
+            [("insert", "body[0]"), ("delete", "body[2]")],
+        )
+
+    def test_deleted_statement(self):
+        self.assertEqual(ops("a()\nb()\nc()", "a()\nc()"), [("delete", "body[1]")])
+
+    def test_inserted_statement(self):
+        self.assertEqual(ops("a()\nc()", "a()\nb()\nc()"), [("insert", "body[1]")])
+
+    def test_statement_of_another_type(self):
+        self.assertEqual(ops("a()\nx = 1", "a()\ny()"), [("delete", "body[1]"), ("insert", "body[1]")])
+
+    def test_replaced_expression(self):
+        self.assertEqual(ops("x = f()", "x = 1"), [("replace", "body[0].value")])
+
+    def test_updated_field(self):
+        [op] = diff_trees(ast.parse("x = 1"), ast.parse("x = 2"))
+        self.assertEqual((op.kind, op.path, op.fields), ("update", "body[0].value", {"value": (1, 2)}))
+
+    def test_empty_list_opposite_nodes(self):
+        self.assertEqual(ops("def f(): pass", "def f(a): pass"), [("insert", "body[0].args.args[0]")])
+
+    def test_dict_unpacking(self):
+        # The key of **a is None in Dict.keys; it is not a node to delete.
+        self.assertEqual(
+            ops("{**a}", "{1: 2}"),
+            [("insert", "body[0].value.keys[0]"), ("delete", "body[0].value.values[0]"),
+             ("insert", "body[0].value.values[0]")],
+        )
+        self.assertEqual(
+            ops("{1: 2}", "{**a}"),
+            [("delete", "body[0].value.keys[0]"), ("delete", "body[0].value.values[0]"),
+             ("insert", "body[0].value.values[0]")],
+        )
+        for op in diff_trees(ast.parse("{**a, 1: 2}"), ast.parse("{3: 4, **b}")):
+            self.assertIsNotNone(op.old if op.kind != "insert" else op.new)
+
+    def test_deep_expression(self):
+        old = "x = " + " + ".join(["1"] * 900)
+        self.assertEqual(ops(old, old[:-1] + "2"), [("update", "body[0].value.right")])
+
+    def test_gap_window(self):
+        within = "f()\n" * (GAP_WINDOW - 1) + "x = 2"
+        self.assertEqual(
+            ops("x = 1", within),
+            [("insert", f"body[{i}]") for i in range(GAP_WINDOW - 1)]
+            + [("update", f"body[{GAP_WINDOW - 1}].value")],
+        )
+        # Past the window an old statement is deleted rather than matched.
+        old = "x = 1"
+        new = "f()\n" * GAP_WINDOW + "x = 2"
+        self.assertEqual(
+            ops(old, new),
+            [("delete", "body[0]")] + [("insert", f"body[{i}]") for i in range(GAP_WINDOW + 1)],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+import json
+import shlex
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools import batch
+from tools.batch import CHECKPOINT, parse_command, read_checkpoint, run_batch
+from tools.benchmark import DATA_DIR, load_pair
+from tools.classify import Classifier
+
+
+class ParseCommandTest(unittest.TestCase):
+    def test_placeholders(self):
+        self.assertEqual(parse_command("cp '{bef}' {out}"), ["cp", "{bef}", "{out}"])
+
+    def test_literal_braces(self):
+        [arg] = parse_command("echo {{x}}")[1:]
+        self.assertEqual(arg.format(), "{x}")
+
+    def test_unknown_placeholder(self):
+        with self.assertRaisesRegex(ValueError, r"unknown placeholder \{after\}"):
+            parse_command("cp {after} {out}")
+
+    def test_unbalanced(self):
+        for command in ("echo {", "echo }", "echo '{bef}", ""):
+            with self.subTest(command=command), self.assertRaises(ValueError):
+                parse_command(command)
+
+
+class RunBatchTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.output = self.tmp / "output"
+        self.pairs = [load_pair(DATA_DIR / f"{n}.json") for n in ("238", "225")]
+        self.classifier = Classifier(self.tmp / "verdicts")
+
+    def run_batch(self, command: str, pairs=None) -> dict:
+        return run_batch(pairs or self.pairs, command, self.output, classifier=self.classifier)
+
+    def files(self) -> list[str]:
+        return sorted(
+            str(p.relative_to(self.output)) for p in self.output.rglob("*") if p.is_file()
+        )
+
+    def test_outputs_are_filed(self):
+        # The unmigrated file still uses the old library.
+        records = self.run_batch("cp {bef} {out}")
+        self.assertEqual(self.files(), [CHECKPOINT, "fail/225.py", "fail/238.py"])
+        self.assertEqual(records["238"]["category"], "wrong_library")
+        self.assertEqual(records["238"]["outcome"], "fail")
+
+    def test_success(self):
+        [pair] = self.pairs[:1]
+        records = self.run_batch(f"cp {shlex.quote(str(pair.aft_file))} {{out}}", [pair])
+        self.assertEqual(self.files(), [CHECKPOINT, "success/238.py"])
+        self.assertEqual(records["238"]["score"], 1.0)
+
+    def test_no_output(self):
+        records = self.run_batch("false", self.pairs[:1])
+        self.assertEqual(self.files(), [CHECKPOINT])
+        self.assertEqual(records["238"]["category"], "others")
+        self.assertTrue(records["238"]["error"].startswith("exit status 1"))
+
+    def test_resume_from_checkpoint(self):
+        first = self.run_batch("cp {bef} {out}", self.pairs[:1])
+        # Only the pair missing from the checkpoint is migrated again.
+        records = self.run_batch("false")
+        self.assertEqual(records["238"], first["238"])
+        self.assertEqual(records["225"]["category"], "others")
+        self.assertEqual(self.files(), [CHECKPOINT, "fail/238.py"])
+        self.assertEqual(read_checkpoint(self.output), records)
+        with open(self.output / CHECKPOINT, encoding="utf-8") as f:
+            self.assertEqual([json.loads(line)["pair"] for line in f], ["238", "225"])
+
+    def test_restart_refiles_output(self):
+        [pair] = self.pairs[:1]
+        self.run_batch("cp {bef} {out}", [pair])
+        (self.output / CHECKPOINT).unlink()
+        self.run_batch(f"cp {shlex.quote(str(pair.aft_file))} {{out}}", [pair])
+        self.assertEqual(self.files(), [CHECKPOINT, "success/238.py"])
+
+    def test_main_rejects_bad_arguments(self):
+        for argv in (["--command", "cp {after} {out}"], ["--command", "true", "--jobs", "0"]):
+            with self.subTest(argv=argv), mock.patch("sys.stderr"):
+                with self.assertRaises(SystemExit):
+                    batch.main([str(self.output), *argv])
+        self.assertFalse(self.output.exists())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,111 @@
+import os
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools.cache import SourceCache
+
+
+def nested(depth: int) -> list:
+    value: list = []
+    for _ in range(depth):
+        value = [value]
+    return value
+
+
+class SourceCacheTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.directory = self.tmp / "cache"
+        self.calls = 0
+
+    def source(self, name: str, text: str | None = None) -> Path:
+        path = self.tmp / f"{name}.py"
+        path.write_text(text if text is not None else f"{name} = 1\n", encoding="utf-8")
+        return path
+
+    def derive(self, value):
+        def derive(tree):
+            self.calls += 1
+            return value
+        return derive
+
+    def test_hits_and_misses(self):
+        cache = SourceCache(self.directory)
+        self.assertEqual(cache.derived(self.source("a"), "kind", self.derive(1)), 1)
+        self.assertEqual(cache.derived(self.source("a"), "kind", self.derive(2)), 1)
+        # The key is the content, not the path.
+        self.assertEqual(cache.derived(self.source("b", "a = 1\n"), "kind", self.derive(3)), 1)
+        self.assertEqual((cache.hits, cache.misses, self.calls), (2, 1, 1))
+        self.assertEqual(cache.stats(), "parse cache: 2 hits, 1 misses (67% hit rate)")
+
+    def test_kind_is_part_of_key(self):
+        cache = SourceCache(self.directory)
+        cache.derived(self.source("a"), "one", self.derive(1))
+        self.assertEqual(cache.derived(self.source("a"), "two", self.derive(2)), 2)
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+    def test_shared_directory(self):
+        SourceCache(self.directory).derived(self.source("a"), "kind", self.derive(1))
+        other = SourceCache(self.directory)
+        self.assertEqual(other.derived(self.source("a"), "kind", self.derive(2)), 1)
+        self.assertEqual((other.hits, other.misses), (1, 0))
+
+    def test_unpicklable_value(self):
+        cache = SourceCache(self.directory)
+        for value in (lambda: None, nested(100_000)):
+            with self.subTest(type=type(value).__name__):
+                path = self.source("a", f"# {id(value)}\n")
+                self.assertIs(cache.derived(path, "kind", self.derive(value)), value)
+                self.assertIs(cache.derived(path, "kind", self.derive(value)), value)
+        self.assertEqual((cache.hits, cache.misses), (0, 4))
+        self.assertEqual([p for p in self.directory.iterdir()], [])
+
+    def test_entry_removed_after_read(self):
+        cache = SourceCache(self.directory)
+        cache.derived(self.source("a"), "kind", self.derive(1))
+        with mock.patch("tools.cache.os.utime", side_effect=FileNotFoundError):
+            self.assertEqual(cache.derived(self.source("a"), "kind", self.derive(2)), 1)
+        self.assertEqual(cache.hits, 1)
+
+    def test_evicts_least_recently_used(self):
+        value = b"x" * 1000
+        cache = SourceCache(self.directory, max_bytes=3500)
+        for age, name in enumerate("abc"):
+            cache.derived(self.source(name), "kind", self.derive(value))
+            [entry] = [p for p in self.directory.iterdir() if p.stat().st_mtime > 2000]
+            os.utime(entry, (1000 + age, 1000 + age))
+        cache.derived(self.source("a"), "kind", self.derive(value))  # a is used again
+        cache.derived(self.source("d"), "kind", self.derive(value))  # over the limit
+        self.assertEqual(len(list(self.directory.iterdir())), 2)
+
+        check = SourceCache(self.directory)
+        for name in "ad":
+            check.derived(self.source(name), "kind", self.derive(value))
+        self.assertEqual((check.hits, check.misses), (2, 0))
+        for name in "bc":
+            check.derived(self.source(name), "kind", self.derive(value))
+        self.assertEqual((check.hits, check.misses), (2, 2))
+
+    def test_scans_only_over_estimate(self):
+        cache = SourceCache(self.directory, max_bytes=3500)
+        with mock.patch.object(cache, "_evict", wraps=cache._evict) as evict:
+            for name in "abc":
+                cache.derived(self.source(name), "kind", self.derive(b"x" * 1000))
+            self.assertEqual(evict.call_count, 1)  # the first store measures the directory
+            cache.derived(self.source("d"), "kind", self.derive(b"x" * 1000))
+            self.assertEqual(evict.call_count, 2)
+
+    def test_clear(self):
+        cache = SourceCache(self.directory)
+        cache.derived(self.source("a"), "kind", self.derive(1))
+        cache.clear()
+        cache.derived(self.source("a"), "kind", self.derive(1))
+        self.assertEqual((cache.hits, cache.misses), (0, 2))
+
+
+if __name__ == "__main__":
+    unittest.main()
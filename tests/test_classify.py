@@ -0,0 +1,103 @@
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools import classify
+from tools.benchmark import DATA_DIR, load_pair
+from tools.classify import Classifier, categorize
+
+OK = {
+    "status": "ok",
+    "old_imports_left": [],
+    "new_imports_missing": [],
+    "old_apis_left": [],
+    "new_apis_missing": [],
+}
+
+
+class CategorizeTest(unittest.TestCase):
+    def test_success(self):
+        self.assertIsNone(categorize(OK))
+
+    def test_status(self):
+        self.assertEqual(categorize({"status": "syntax_error"}), "parse_error")
+        self.assertEqual(categorize({"status": "missing"}), "others")
+
+    def test_library_checked_before_apis(self):
+        result = {**OK, "old_imports_left": ["msgpack"], "new_apis_missing": ["packb"]}
+        self.assertEqual(categorize(result), "wrong_library")
+        self.assertEqual(categorize({**OK, "new_imports_missing": ["umsgpack"]}), "wrong_library")
+
+    def test_apis(self):
+        self.assertEqual(categorize({**OK, "old_apis_left": ["packb"]}), "wrong_api")
+        self.assertEqual(categorize({**OK, "new_apis_missing": ["dumps"]}), "wrong_api")
+
+
+class ClassifierTest(unittest.TestCase):
+    """Verdicts are memoised by candidate content and reference inputs."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.pair = load_pair(DATA_DIR / "225.json")
+        self.candidate = self.tmp / "225.py"
+        shutil.copy(self.pair.aft_file, self.candidate)
+
+    def classifier(self) -> Classifier:
+        return Classifier(self.tmp / "verdicts")
+
+    def test_reference_migration_succeeds(self):
+        verdict = self.classifier().classify(self.pair, self.candidate)
+        self.assertIsNone(verdict["category"])
+        self.assertEqual(verdict["score"], 1.0)
+
+    def test_hit_across_instances(self):
+        first = self.classifier()
+        verdict = first.classify(self.pair, self.candidate)
+        second = self.classifier()
+        self.assertEqual(second.classify(self.pair, self.candidate), verdict)
+        self.assertEqual((first.hits, first.misses, second.hits, second.misses), (0, 1, 1, 0))
+
+    def test_key_ignores_path(self):
+        classifier = self.classifier()
+        classifier.classify(self.pair, self.candidate)
+        copy = self.tmp / "fail" / "225.py"
+        copy.parent.mkdir()
+        shutil.copy(self.candidate, copy)
+        verdict = classifier.classify(self.pair, copy)
+        self.assertEqual(classifier.hits, 1)
+        self.assertEqual(verdict["candidate"], str(copy))
+
+    def test_key_covers_content(self):
+        classifier = self.classifier()
+        classifier.classify(self.pair, self.candidate)
+        self.candidate.write_text("import msgpack\n", encoding="utf-8")
+        verdict = classifier.classify(self.pair, self.candidate)
+        self.assertEqual(classifier.misses, 2)
+        self.assertEqual(verdict["category"], "wrong_library")
+
+    def test_key_covers_pair(self):
+        classifier = self.classifier()
+        classifier.classify(self.pair, self.candidate)
+        other = load_pair(DATA_DIR / "218.json")
+        classifier.classify(other, self.candidate)
+        self.assertEqual(classifier.misses, 2)
+
+    def test_key_covers_version(self):
+        self.classifier().classify(self.pair, self.candidate)
+        with mock.patch.object(classify, "CLASSIFIER_VERSION", classify.CLASSIFIER_VERSION + 1):
+            classifier = self.classifier()
+            classifier.classify(self.pair, self.candidate)
+        self.assertEqual(classifier.misses, 1)
+
+    def test_missing_candidate(self):
+        classifier = self.classifier()
+        self.assertEqual(classifier.classify(self.pair, None)["category"], "others")
+        self.assertEqual((classifier.hits, classifier.misses), (0, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
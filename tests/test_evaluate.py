@@ -0,0 +1,126 @@
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools import evaluate
+from tools.benchmark import DATA_DIR, RESULT_DIR, load_pair
+from tools.evaluate import library_packages
+
+
+class LibraryPackagesTest(unittest.TestCase):
+    def test_dotted_distribution(self):
+        # ``import ruamel.yaml`` imports the ``ruamel`` package.
+        self.assertEqual(library_packages({"ruamel", "os"}, "ruamel.yaml"), {"ruamel"})
+
+    def test_suffix_of_distribution(self):
+        self.assertEqual(library_packages({"semver", "yaml"}, "node-semver"), {"semver"})
+
+    def test_unrelated_import_name(self):
+        # u-msgpack-python is imported as umsgpack, which only the
+        # descriptor's api_imports can tell.
+        self.assertEqual(library_packages({"umsgpack", "msgpack"}, "u-msgpack-python"), set())
+        self.assertEqual(
+            library_packages({"umsgpack", "msgpack"}, "u-msgpack-python", ["umsgpack"]), {"umsgpack"}
+        )
+
+    def test_case_and_separators(self):
+        self.assertEqual(library_packages({"RPi"}, "RPi.GPIO"), {"RPi"})
+        self.assertEqual(library_packages({"kafka"}, "kafka-python"), {"kafka"})
+        self.assertEqual(library_packages({"pyyaml"}, "PyYAML"), {"pyyaml"})
+
+    def test_no_partial_words(self):
+        self.assertEqual(library_packages({"sem", "node_sem"}, "node-semver"), set())
+
+
+class ScorePairTest(unittest.TestCase):
+    def test_old_library_without_matching_name(self):
+        # attrs is imported as attr, which shares no word with the name.
+        pair = load_pair(DATA_DIR / "238.json")
+        result = evaluate.score_pair(pair, pair.bef_file)
+        self.assertEqual(result["old_imports_left"], ["attr"])
+        self.assertEqual(result["import_score"], 0.0)
+        self.assertEqual(evaluate.score_pair(pair, pair.aft_file)["score"], 1.0)
+
+    def test_main_rejects_bad_arguments(self):
+        for argv in (["no-such-directory"], [str(RESULT_DIR / "llama"), "--jobs", "0"]):
+            with self.subTest(argv=argv), mock.patch("sys.stderr"):
+                with self.assertRaises(SystemExit):
+                    evaluate.main(argv)
+
+
+class ManifestTest(unittest.TestCase):
+    """Replay and invalidation of --incremental results."""
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.pair = load_pair(DATA_DIR / "238.json")
+        self.candidates = self.tmp / "candidates"
+        (self.candidates / "success").mkdir(parents=True)
+        self.candidate = self.candidates / "success" / "238.py"
+        shutil.copy(RESULT_DIR / "llama" / "success" / "238.py", self.candidate)
+        self.manifest = self.tmp / "manifest.json"
+
+    def run_evaluate(self) -> dict:
+        [result] = evaluate.evaluate([self.pair], self.candidates, jobs=1, manifest=self.manifest)
+        return result
+
+    def mark_stored_result(self) -> None:
+        """Overwrite the stored result, so that a replay can be told apart."""
+        with open(self.manifest, encoding="utf-8") as f:
+            manifest = json.load(f)
+        manifest["pairs"]["238"]["result"]["score"] = -1.0
+        with open(self.manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+
+    def test_replays_unchanged_inputs(self):
+        first = self.run_evaluate()
+        self.assertEqual(first["status"], "ok")
+        self.assertEqual(self.run_evaluate(), first)
+        self.mark_stored_result()
+        self.assertEqual(self.run_evaluate()["score"], -1.0)
+
+    def test_changed_candidate(self):
+        self.run_evaluate()
+        self.mark_stored_result()
+        with open(self.candidate, "a", encoding="utf-8") as f:
+            f.write("\n# edited\n")
+        self.assertNotEqual(self.run_evaluate()["score"], -1.0)
+
+    def test_moved_candidate(self):
+        self.run_evaluate()
+        self.mark_stored_result()
+        (self.candidates / "fail").mkdir()
+        moved = self.candidate.rename(self.candidates / "fail" / "238.py")
+        result = self.run_evaluate()
+        self.assertNotEqual(result["score"], -1.0)
+        self.assertEqual(result["candidate"], str(moved))
+
+    def test_removed_candidate(self):
+        self.run_evaluate()
+        self.candidate.unlink()
+        self.assertEqual(self.run_evaluate()["status"], "missing")
+
+    def test_version_change(self):
+        self.run_evaluate()
+        self.mark_stored_result()
+        with mock.patch.object(evaluate, "MANIFEST_VERSION", evaluate.MANIFEST_VERSION + 1):
+            self.assertNotEqual(self.run_evaluate()["score"], -1.0)
+
+    def test_no_run_fields_stored(self):
+        [result] = evaluate.evaluate(
+            [self.pair], self.candidates, jobs=1, manifest=self.manifest, profile=True
+        )
+        self.assertIn("timings", result)
+        with open(self.manifest, encoding="utf-8") as f:
+            stored = json.load(f)["pairs"]["238"]["result"]
+        self.assertNotIn("timings", stored)
+        self.assertEqual(stored, {k: v for k, v in result.items() if k != "timings"})
+
+
+if __name__ == "__main__":
+    unittest.main()
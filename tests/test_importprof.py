@@ -0,0 +1,112 @@
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+
+from tools.benchmark import ROOT
+from tools.importprof import run_profile
+
+
+class RunProfileTest(unittest.TestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+
+    def profile(self, source: str, **kwargs) -> dict:
+        path = self.tmp / "sample.py"
+        path.write_text(textwrap.dedent(source), encoding="utf-8")
+        return run_profile(path, **kwargs)
+
+    def assertRuns(self, source: str) -> dict:
+        profile = self.profile(source)
+        self.assertIsNone(profile["error"])
+        return profile
+
+    def test_measures_modules_the_profiler_uses(self):
+        # tools.importprof imports concurrent.futures, and with it
+        # multiprocessing; the child must not have them loaded already.
+        profile = self.assertRuns("import multiprocessing\n")
+        self.assertEqual(profile["preloaded"], [])
+        self.assertIn("multiprocessing", [r["module"] for r in profile["modules"]])
+
+    def test_missing_package_is_stubbed(self):
+        profile = self.assertRuns("import pig_missing.sub as m\nm.f(1).g[2]()\n")
+        self.assertEqual(profile["stubbed"], ["pig_missing"])
+        self.assertTrue(all(r["stub"] for r in profile["modules"] if r["module"].startswith("pig_")))
+
+    def test_stub_class_subscript(self):
+        self.assertRuns(
+            """
+            import pig_missing
+            del pig_missing._checks["logical_line"][pig_missing.continued_indentation]
+            pig_missing.Table["key"] = 1
+            for item in pig_missing.Items:
+                pass
+            """
+        )
+
+    def test_stub_operators(self):
+        self.assertRuns(
+            """
+            import pig_missing
+            types = pig_missing.integer_types + (bytes, str)
+            flags = pig_missing.A | pig_missing.B
+            value = -(pig_missing.Const() * 2) + 1
+            """
+        )
+
+    def test_stub_decorators(self):
+        self.assertRuns(
+            """
+            import pig_missing
+
+            @pig_missing.group()
+            def cli():
+                return 1
+
+            @cli.command("use")
+            @pig_missing.option("--cwd")
+            def use():
+                pass
+
+            @pig_missing.Decorator
+            def plain():
+                return 2
+
+            assert cli() == 1 and plain() == 2
+
+            class Model(pig_missing.Module):
+                def __init__(self, layer):
+                    self.layer = layer
+
+            assert Model(len).layer is len
+            """
+        )
+
+    def test_stub_context_manager(self):
+        self.assertRuns("import pig_missing\nwith pig_missing.Camera() as camera:\n    camera.start()\n")
+
+    def test_relative_imports(self):
+        profile = self.assertRuns(
+            "from . import sibling\nfrom ..conftest import fixture\nfrom ...a.b import c\n"
+        )
+        self.assertEqual(profile["stubbed"], [])
+
+    def test_runs_in_temporary_directory(self):
+        marker = "pig-importprof-test-output.txt"
+        self.assertRuns(f"open({marker!r}, 'w').close()\n")
+        self.assertFalse((ROOT / marker).exists())
+        self.assertFalse((Path.cwd() / marker).exists())
+
+    def test_endless_file_is_stopped(self):
+        profile = self.profile("import json\nwhile True:\n    pass\n", timeout=0.5)
+        self.assertEqual(profile["error"], "TimeoutError: stopped after 0.5s")
+        self.assertIn("json", [r["module"] for r in profile["modules"]])
+
+    def test_syntax_error(self):
+        self.assertTrue(self.profile("def broken(:\n")["error"].startswith("SyntaxError"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import tempfile
+import unittest
+from dataclasses import replace
+from pathlib import Path
+from unittest import mock
+
+from tools.benchmark import DATA_DIR, load_pair
+from tools.metastore import STORE_VERSION, MetadataStore, build_store, main, save_store
+
+
+def make_store() -> MetadataStore:
+    base = load_pair(DATA_DIR / "1.json")
+    pairs = [
+        replace(base, id="1", domain="Web Framework&HTTP Clients", libo="flask", libn="fastapi"),
+        replace(base, id="2", domain="HTTP Clients", libo="urllib3", libn="requests"),
+        replace(base, id="3", domain="HTTP Clients&HTML", libo="urllib3", libn="httpx"),
+        replace(base, id="4", domain="HTML", libo="lxml", libn="bs4"),
+    ]
+    return MetadataStore(build_store(pairs), DATA_DIR)
+
+
+class FilterTest(unittest.TestCase):
+    def setUp(self):
+        self.store = make_store()
+
+    def ids(self, **criteria) -> list[str]:
+        return [self.store.value("id", row) for row in self.store.filter(**criteria)]
+
+    def test_joined_domain_matches_each_part(self):
+        self.assertEqual(self.ids(domain="HTTP Clients"), ["1", "2", "3"])
+        self.assertEqual(self.ids(domain="HTML"), ["3", "4"])
+        self.assertEqual(self.ids(domain="Web Framework"), ["1"])
+
+    def test_joined_domain_matches_full_value(self):
+        self.assertEqual(self.ids(domain="HTTP Clients&HTML"), ["3"])
+
+    def test_no_partial_part(self):
+        self.assertEqual(self.ids(domain="HTTP"), [])
+        self.assertEqual(self.ids(domain="HTML&HTTP Clients"), [])
+
+    def test_criteria_intersect(self):
+        self.assertEqual(self.ids(domain="HTTP Clients", libo="urllib3"), ["2", "3"])
+        self.assertEqual(self.ids(domain="HTML", libo="urllib3", libn="httpx"), ["3"])
+        self.assertEqual(self.ids(domain="HTML", libn="requests"), [])
+
+    def test_other_columns_are_not_split(self):
+        self.assertEqual(self.ids(libo="url"), [])
+
+    def test_without_criteria(self):
+        self.assertEqual(self.ids(), ["1", "2", "3", "4"])
+
+    def test_unindexed_column(self):
+        with self.assertRaises(KeyError):
+            self.store.filter(url="x")
+
+    def test_decoded_values(self):
+        [row] = self.store.filter(libn="httpx")
+        self.assertEqual(self.store.value("domain", row), "HTTP Clients&HTML")
+        self.assertEqual(self.store.pair(row).libo, "urllib3")
+
+
+class VersionTest(unittest.TestCase):
+    def test_rejects_other_version(self):
+        store = build_store([load_pair(DATA_DIR / "1.json")])
+        store["version"] = STORE_VERSION + 1
+        with self.assertRaises(ValueError):
+            MetadataStore(store)
+
+    def test_main_reports_other_version(self):
+        store = build_store([load_pair(DATA_DIR / "1.json")])
+        store["version"] = STORE_VERSION + 1
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "metadata.json"
+            save_store(store, path)
+            with mock.patch("sys.stderr"), self.assertRaises(SystemExit) as cm:
+                main(["--store", str(path), "query"])
+        self.assertEqual(cm.exception.code, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,24 @@
+import re
+import unittest
+
+from tools.benchmark import DATA_DIR, load_pair
+from tools.evaluate import api_names
+from tools.microbench import CASES
+
+
+class CasesTest(unittest.TestCase):
+    def test_labels_name_listed_apis(self):
+        # "old -> new", or a single side when both libraries share the API.
+        for case in CASES:
+            with self.subTest(pair=case.pair):
+                pair = load_pair(DATA_DIR / f"{case.pair}.json")
+                old, _, new = case.api.partition(" -> ")
+                self.assertLessEqual(set(re.findall(r"\w+", old)), api_names(pair.apio))
+                self.assertLessEqual(set(re.findall(r"\w+", new or old)), api_names(pair.apin))
+
+    def test_one_case_per_pair(self):
+        self.assertEqual(len({case.pair for case in CASES}), len(CASES))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,5 @@
+"""Helper tooling for working with the PIG benchmark data.
+
+The modules in this package only depend on the standard library and are meant
+to be run from the repository root, e.g. ``python -m tools.evaluate``.
+"""
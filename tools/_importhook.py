@@ -0,0 +1,318 @@
+"""Child side of :mod:`tools.importprof`.
+
+This module is executed by a bare ``python -c`` bootstrap, not imported as
+part of :mod:`tools`, so that the interpreter holds as few modules as
+possible when the benchmark file runs: anything already in ``sys.modules``
+would not be measured.  It therefore imports nothing beyond ``importlib``,
+``time`` and modules every interpreter loads at startup (``sys``, ``os``)
+until the profile is taken.  The parent passes the file and the top-level
+packages it imports on the command line::
+
+    python -c BOOTSTRAP tools/_importhook.py FILE MEMORY TIMEOUT PACKAGE...
+
+and reads the profile from the last line of standard output.
+"""
+
+import importlib.machinery
+import os
+import sys
+import time
+
+_PACKAGE = "_pig_benchmark_file"
+# Stub package levels above the executed file.
+_DEPTH = 5
+_ModuleType = type(sys)
+
+
+_OPERATORS = (
+    "add", "sub", "mul", "matmul", "truediv", "floordiv", "mod", "pow",
+    "lshift", "rshift", "and", "or", "xor",
+)
+
+
+def _stub_result(self, *args):
+    return _Stub()
+
+
+class _StubBehaviour:
+    """What stub classes and stub instances both do.
+
+    This is a base of the metaclass as well as of :class:`_Stub`, because
+    the interpreter looks special methods up on the type: ``stub[0]`` uses the
+    class of ``stub`` and ``Stub[0]`` the metaclass.
+    """
+
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        return _stub_class(name)
+
+    def __iter__(self):
+        return iter(())
+
+    def __getitem__(self, key):
+        return _Stub()
+
+    def __setitem__(self, key, value):
+        pass
+
+    def __delitem__(self, key):
+        pass
+
+    def __enter__(self):
+        return _Stub()
+
+    def __exit__(self, *exc_info):
+        return False
+
+    for _name in _OPERATORS:
+        locals()[f"__{_name}__"] = locals()[f"__r{_name}__"] = _stub_result
+    __neg__ = __pos__ = __invert__ = _stub_result
+    del _name
+
+
+def _stub_call(args, kwargs):
+    """Return the decorated callable when called as a decorator, else ``None``."""
+    if len(args) == 1 and not kwargs and callable(args[0]):
+        func = args[0]
+        # Keep classes as they are; wrap functions, since decorators such as
+        # ``@click.group()`` return objects with attributes of their own.
+        return func if isinstance(func, type) else _Decorated(func)
+    return None
+
+
+class _StubMeta(_StubBehaviour, type):
+    def __call__(cls, *args, **kwargs):
+        # Only generated stub classes act as decorators; classes the file
+        # derives from them are instantiated normally.
+        if "_generated" in cls.__dict__:
+            decorated = _stub_call(args, kwargs)
+            if decorated is not None:
+                return decorated
+        return super().__call__(*args, **kwargs)
+
+
+class _Stub(_StubBehaviour, metaclass=_StubMeta):
+    """Stand-in for any object of a missing package.
+
+    Instances accept any arguments, and attribute access, indexing, iteration
+    and operators return further stubs.  Called with a single callable, as a
+    decorator is, a stub returns that callable (functions wrapped so that
+    attribute access on them yields stubs too).
+    """
+
+    def __init__(self, *args, **kwargs):
+        pass
+
+    def __call__(self, *args, **kwargs):
+        decorated = _stub_call(args, kwargs)
+        return _Stub() if decorated is None else decorated
+
+
+class _Decorated(_Stub):
+    """A function decorated by a stub: callable as before, stub attributes."""
+
+    def __init__(self, func):
+        self.__dict__["_func"] = func
+        self.__dict__["__name__"] = getattr(func, "__name__", "")
+
+    def __call__(self, *args, **kwargs):
+        return self._func(*args, **kwargs)
+
+    def __get__(self, instance, owner=None):
+        return self._func.__get__(instance, owner)
+
+
+def _stub_class(name):
+    return _StubMeta(name, (_Stub,), {"_generated": True})
+
+
+class _StubModule(_ModuleType):
+    def __getattr__(self, name):
+        if name.startswith("__") and name.endswith("__"):
+            raise AttributeError(name)
+        value = _stub_class(name)
+        setattr(self, name, value)
+        return value
+
+
+class _StubLoader:
+    def create_module(self, spec):
+        module = _StubModule(spec.name)
+        module.__path__ = []
+        return module
+
+    def exec_module(self, module):
+        pass
+
+
+class _TimedLoader:
+    """Wrap a loader so that executing the module is measured."""
+
+    def __init__(self, loader, profiler):
+        self._loader = loader
+        self._profiler = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._loader, name)
+
+    def create_module(self, spec):
+        return self._loader.create_module(spec)
+
+    def exec_module(self, module):
+        record = self._profiler.enter(module.__name__)
+        try:
+            self._loader.exec_module(module)
+        finally:
+            self._profiler.exit(record)
+
+
+def _find_spec(name, path=None, skip=None):
+    for finder in sys.meta_path:
+        if finder is skip or not hasattr(finder, "find_spec"):
+            continue
+        spec = finder.find_spec(name, path)
+        if spec is not None:
+            return spec
+    return None
+
+
+class _Profiler:
+    """Meta path finder that times imports and stubs missing packages."""
+
+    def __init__(self, stub_packages, memory):
+        self.stub_packages = stub_packages
+        self.memory = memory
+        self.records = []
+        self._stack = []
+
+    def find_spec(self, name, path, target=None):
+        spec = _find_spec(name, path, skip=self)
+        if spec is None:
+            top = name.split(".")[0]
+            if top not in self.stub_packages and top != _PACKAGE:
+                return None
+            self.records.append(self._record(name, stub=True))
+            return importlib.machinery.ModuleSpec(name, _StubLoader(), is_package=True)
+        if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+            spec.loader = _TimedLoader(spec.loader, self)
+        return spec
+
+    def _record(self, name, stub):
+        parent = self._stack[-1]["module"] if self._stack else None
+        return {"module": name, "parent": parent, "stub": stub, "inclusive_s": 0.0, "self_s": 0.0}
+
+    def enter(self, name):
+        record = self._record(name, stub=False)
+        self.records.append(record)
+        self._stack.append(record)
+        record["_children"] = len(self.records)
+        record["_memory"] = _traced_memory()[0] if self.memory else 0
+        record["_start"] = time.perf_counter()
+        return record
+
+    def exit(self, record):
+        elapsed = time.perf_counter() - record.pop("_start")
+        self._stack.pop()
+        children = sum(
+            r["inclusive_s"]
+            for r in self.records[record.pop("_children"):]
+            if r["parent"] == record["module"]
+        )
+        record["inclusive_s"] = elapsed
+        record["self_s"] = elapsed - children
+        memory = record.pop("_memory")
+        if self.memory:
+            record["memory_bytes"] = _traced_memory()[0] - memory
+
+
+def _traced_memory():
+    # The C module is built in; the tracemalloc wrapper would import re, etc.
+    import _tracemalloc
+
+    return _tracemalloc.get_traced_memory()
+
+
+def _stop_after(seconds):
+    """Raise :class:`TimeoutError` in the executed file after ``seconds``.
+
+    Benchmark scripts may loop forever (polling a button, serving requests);
+    stopping them from inside keeps the imports measured so far.
+    """
+    import _signal  # built in and loaded at startup, unlike signal
+
+    if not hasattr(_signal, "setitimer"):
+        return
+
+    def expire(signum, frame):
+        raise TimeoutError(f"stopped after {seconds:g}s")
+
+    _signal.signal(_signal.SIGALRM, expire)
+    _signal.setitimer(_signal.ITIMER_REAL, seconds)
+
+
+def profile_file(path, packages, memory=False, timeout=None):
+    """Execute ``path`` in this interpreter and return its import profile.
+
+    ``packages`` are the top-level packages the file imports, as found by
+    :func:`tools.evaluate.imported_packages`.  This changes ``sys.modules``
+    and ``sys.meta_path`` for good, so it is meant to run in a throwaway
+    process; see :func:`tools.importprof.run_profile`.  The file is stopped
+    after ``timeout`` seconds where timers are available.
+    """
+    path = str(path)
+    preloaded = sorted(pkg for pkg in packages if pkg in sys.modules)
+    stub_packages = {pkg for pkg in packages if pkg not in sys.modules and _find_spec(pkg) is None}
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec")
+    if memory:
+        _traced_memory()  # import the C module before the hook is installed
+    profiler = _Profiler(stub_packages, memory)
+    sys.meta_path.insert(0, profiler)
+    # The file lives in a chain of stub packages, so that ``from ..x import y``
+    # resolves (to a stub) for up to _DEPTH leading dots.
+    package = _PACKAGE
+    for level in range(_DEPTH):
+        if level:
+            package = f"{package}.level{level}"
+        loader = _StubLoader()
+        sys.modules[package] = loader.create_module(importlib.machinery.ModuleSpec(package, loader))
+    module = _ModuleType(f"{package}.{os.path.splitext(os.path.basename(path))[0]}")
+    module.__file__ = path
+    module.__package__ = package
+
+    if memory:
+        sys.modules["_tracemalloc"].start(1)
+    error = None
+    if timeout:
+        _stop_after(timeout)
+    start = time.perf_counter()
+    try:
+        exec(code, module.__dict__)
+    except BaseException as e:  # benchmark code may fail or exit in many ways
+        error = f"{type(e).__name__}: {e}"
+    total = time.perf_counter() - start
+    if timeout:
+        _stop_after(0)
+    if profiler in sys.meta_path:
+        sys.meta_path.remove(profiler)
+    result = {
+        "file": path,
+        "total_s": total,
+        "import_s": sum(r["inclusive_s"] for r in profiler.records if r["parent"] is None),
+        "stubbed": sorted(stub_packages),
+        "preloaded": preloaded,
+        "error": error,
+        "modules": profiler.records,
+    }
+    if memory:
+        result["peak_memory_bytes"] = _traced_memory()[1]
+    return result
+
+
+if __name__ == "__main__":
+    _file, _memory, _timeout, *_packages = sys.argv[1:]
+    _result = profile_file(_file, _packages, _memory == "1", float(_timeout))
+    import json
+
+    sys.stdout.write("\n" + json.dumps(_result) + "\n")
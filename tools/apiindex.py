@@ -0,0 +1,146 @@
+"""Inverted index from descriptor APIs to their use sites.
+
+For every pair the ``apio`` names are located in the before file and the
+``apin`` names in the after file.  The index maps an API name to the
+libraries it was listed under and, for each, the sites where it appears::
+
+    python -m tools.apiindex build
+    python -m tools.apiindex query IPNetwork
+    python -m tools.apiindex query get --lib requests
+
+Each site is ``[pair, file, line, column, kind]`` where ``kind`` is ``call``,
+``reference`` or ``import``.  The index is stored as JSON and ``query`` only
+loads that file, so lookups do not touch the source files.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import sys
+from functools import partial
+from pathlib import Path
+from typing import Iterable
+
+from .benchmark import DATA_DIR, ROOT, Pair, load_pairs
+from .cache import SourceCache
+from .evaluate import api_names, parse_file
+
+DEFAULT_INDEX = ROOT / ".pig_cache" / "api_index.json"
+INDEX_VERSION = 1
+
+
+def find_sites(tree: ast.AST, names: set[str]) -> list[tuple[int, int, str, str]]:
+    """Return ``(line, column, kind, name)`` for every use of ``names``.
+
+    Attribute positions point at the attribute itself rather than at the
+    start of the whole ``obj.attr`` expression.
+    """
+    called = {id(node.func) for node in ast.walk(tree) if isinstance(node, ast.Call)}
+    sites = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name) and node.id in names:
+            kind = "call" if id(node) in called else "reference"
+            sites.append((node.lineno, node.col_offset, kind, node.id))
+        elif isinstance(node, ast.Attribute) and node.attr in names:
+            kind = "call" if id(node) in called else "reference"
+            col = node.end_col_offset - len(node.attr)
+            sites.append((node.end_lineno, col, kind, node.attr))
+        elif isinstance(node, ast.alias):
+            for part in node.name.split("."):
+                if part in names:
+                    sites.append((node.lineno, node.col_offset, "import", part))
+    return sorted(sites)
+
+
+def _display(path: Path) -> str:
+    try:
+        return str(path.resolve().relative_to(ROOT))
+    except ValueError:
+        return str(path)
+
+
+def _sites(path: Path, names: set[str], cache: SourceCache | None) -> list[tuple[int, int, str, str]]:
+    derive = partial(find_sites, names=names)
+    if cache is None:
+        return derive(parse_file(path))
+    digest = hashlib.sha256("\0".join(sorted(names)).encode()).hexdigest()[:16]
+    return cache.derived(path, f"sites1-{digest}", derive)
+
+
+def build_index(pairs: Iterable[Pair], cache: SourceCache | None = None) -> dict:
+    """Build the index for ``pairs``, taking sites found before from ``cache``."""
+    apis: dict[str, dict[str, list]] = {}
+    for pair in pairs:
+        for path, library, listed in (
+            (pair.bef_file, pair.libo, pair.apio),
+            (pair.aft_file, pair.libn, pair.apin),
+        ):
+            for line, col, kind, name in _sites(path, api_names(listed), cache):
+                apis.setdefault(name, {}).setdefault(library, []).append(
+                    [pair.id, _display(path), line, col, kind]
+                )
+    return {"version": INDEX_VERSION, "apis": apis}
+
+
+def save_index(index: dict, path: Path = DEFAULT_INDEX) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(index, f, separators=(",", ":"))
+
+
+def load_index(path: Path = DEFAULT_INDEX) -> dict:
+    with open(path, encoding="utf-8") as f:
+        index = json.load(f)
+    if index.get("version") != INDEX_VERSION:
+        raise ValueError("unsupported API index version; rebuild it")
+    return index
+
+
+def query(index: dict, name: str, library: str | None = None) -> dict[str, list]:
+    """Return the sites of ``name``, grouped by library."""
+    found = index["apis"].get(name, {})
+    if library is not None:
+        return {library: found[library]} if library in found else {}
+    return found
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--index", type=Path, default=DEFAULT_INDEX, help="index file")
+    sub = parser.add_subparsers(dest="command", required=True)
+    build = sub.add_parser("build", help="(re)build the index")
+    build.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    build.add_argument("-v", "--verbose", action="store_true", help="report cache statistics")
+    find = sub.add_parser("query", help="look up an API name")
+    find.add_argument("name")
+    find.add_argument("--lib", help="only sites listed under this library")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        cache = SourceCache()
+        index = build_index(load_pairs(args.data), cache)
+        save_index(index, args.index)
+        count = sum(len(s) for libs in index["apis"].values() for s in libs.values())
+        print(f"indexed {count} sites of {len(index['apis'])} APIs", file=sys.stderr)
+        if args.verbose:
+            print(cache.stats(), file=sys.stderr)
+        return 0
+
+    try:
+        index = load_index(args.index)
+    except FileNotFoundError:
+        parser.error(f"{args.index} not found, run 'build' first")
+    except ValueError as e:
+        parser.error(f"{args.index}: {e}")
+    for library, sites in query(index, args.name, args.lib).items():
+        for pair, file, line, col, kind in sites:
+            print(f"{library}\t{pair}\t{file}:{line}:{col}\t{kind}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,312 @@
+"""Structural diff between the ASTs of two Python files.
+
+Every node gets a digest of its structure (positions excluded), so the diff
+descends only into subtrees whose digests differ: large unchanged regions cost
+one comparison.  Statement and expression lists are aligned patience-style,
+anchoring on subtrees that occur exactly once on both sides and taking the
+longest increasing run of those anchors (``O(n log n)``).  Items between
+anchors are matched in order by node type, looking at most ``GAP_WINDOW``
+items ahead, so a list costs ``O(n log n + n * GAP_WINDOW)`` overall.  Both
+trees are walked with explicit stacks, so nesting depth is not limited by
+the recursion limit, and edit operations are yielded as they are found::
+
+    python -m tools.astdiff 200
+    python -m tools.astdiff data/200b.py data/200a.py
+    python -m tools.astdiff --all
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import sys
+from bisect import bisect_left
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterator
+
+from .benchmark import DATA_DIR, load_pair, load_pairs
+from .evaluate import parse_file
+
+# How far ahead _Differ._gap looks for a node of the same type.
+GAP_WINDOW = 32
+
+
+@dataclass
+class EditOp:
+    """A single edit turning the old tree into the new one.
+
+    ``kind`` is ``insert``, ``delete``, ``replace`` (node of another type) or
+    ``update`` (same node type, changed ``fields``).
+    """
+
+    kind: str
+    path: str
+    old: ast.AST | None = None
+    new: ast.AST | None = None
+    fields: dict[str, tuple[object, object]] = field(default_factory=dict)
+
+    @property
+    def old_line(self) -> int | None:
+        return getattr(self.old, "lineno", None)
+
+    @property
+    def new_line(self) -> int | None:
+        return getattr(self.new, "lineno", None)
+
+    def to_dict(self) -> dict:
+        node = self.new if self.new is not None else self.old
+        return {
+            "kind": self.kind,
+            "path": self.path,
+            "node": type(node).__name__,
+            "old_line": self.old_line,
+            "new_line": self.new_line,
+            "fields": {k: [repr(a), repr(b)] for k, (a, b) in self.fields.items()},
+        }
+
+
+def _is_node_list(value) -> bool:
+    return isinstance(value, list) and any(isinstance(v, ast.AST) for v in value)
+
+
+def _scalars(old: ast.AST, new: ast.AST) -> dict[str, tuple[object, object]]:
+    """Return the changed fields of two same-typed nodes that hold no nodes.
+
+    A list field is treated as holding nodes if either side contains one,
+    because an empty list carries no type information.
+    """
+    changed = {}
+    for name, old_value in ast.iter_fields(old):
+        new_value = getattr(new, name)
+        if isinstance(old_value, ast.AST) or isinstance(new_value, ast.AST):
+            continue
+        if _is_node_list(old_value) or _is_node_list(new_value):
+            continue
+        if old_value != new_value:
+            changed[name] = (old_value, new_value)
+    return changed
+
+
+class _Digests:
+    """Lazily computed structural digests, memoised per node."""
+
+    def __init__(self):
+        self._memo: dict[int, bytes] = {}
+
+    def __call__(self, node: ast.AST | None) -> bytes:
+        if node is None:
+            return b""
+        digest = self._memo.get(id(node))
+        if digest is None:
+            # Reversed breadth-first order visits children before their
+            # parent, so deep trees need no recursion.
+            for item in reversed(list(ast.walk(node))):
+                if id(item) not in self._memo:
+                    self._memo[id(item)] = self._digest(item)
+            digest = self._memo[id(node)]
+        return digest
+
+    def _digest(self, node: ast.AST) -> bytes:
+        memo = self._memo
+        h = hashlib.blake2b(digest_size=16)
+        h.update(type(node).__name__.encode())
+        for name, value in ast.iter_fields(node):
+            h.update(name.encode())
+            if isinstance(value, ast.AST):
+                h.update(memo[id(value)])
+            elif _is_node_list(value):
+                for item in value:
+                    h.update(memo[id(item)] if isinstance(item, ast.AST) else repr(item).encode())
+                h.update(b"]")
+            else:
+                h.update(repr(value).encode())
+        return h.digest()
+
+
+def _lis(pairs: list[tuple[int, int]]) -> list[tuple[int, int]]:
+    """Longest subsequence of ``pairs`` (sorted by first) increasing in second."""
+    tails: list[int] = []
+    tail_idx: list[int] = []
+    prev = [-1] * len(pairs)
+    for i, (_, b) in enumerate(pairs):
+        pos = bisect_left(tails, b)
+        if pos == len(tails):
+            tails.append(b)
+            tail_idx.append(i)
+        else:
+            tails[pos] = b
+            tail_idx[pos] = i
+        prev[i] = tail_idx[pos - 1] if pos else -1
+    result = []
+    i = tail_idx[-1] if tail_idx else -1
+    while i != -1:
+        result.append(pairs[i])
+        i = prev[i]
+    return result[::-1]
+
+
+# A pending comparison of two nodes, or an edit ready to be yielded.
+_Task = tuple[ast.AST, ast.AST, str] | EditOp
+
+
+class _Differ:
+    """Walks both trees with explicit stacks, so deep trees need no recursion."""
+
+    def __init__(self):
+        self.digest = _Digests()
+
+    def diff(self, old: ast.AST, new: ast.AST) -> Iterator[EditOp]:
+        stack: list[_Task] = [(old, new, "")]
+        while stack:
+            task = stack.pop()
+            if isinstance(task, EditOp):
+                yield task
+            else:
+                stack.extend(reversed(list(self.node(*task))))
+
+    def node(self, old: ast.AST, new: ast.AST, path: str) -> Iterator[_Task]:
+        """Yield the edits of one node pair and the child pairs to compare."""
+        if self.digest(old) == self.digest(new):
+            return
+        if old is None:
+            yield EditOp("insert", path, None, new)
+            return
+        if new is None:
+            yield EditOp("delete", path, old, None)
+            return
+        if type(old) is not type(new):
+            yield EditOp("replace", path, old, new)
+            return
+        changed = _scalars(old, new)
+        if changed:
+            yield EditOp("update", path, old, new, changed)
+        for name, old_value in ast.iter_fields(old):
+            new_value = getattr(new, name)
+            sub = f"{path}.{name}" if path else name
+            if isinstance(old_value, list) or isinstance(new_value, list):
+                if _is_node_list(old_value) or _is_node_list(new_value):
+                    yield from self.sequence(old_value, new_value, sub)
+            elif isinstance(old_value, ast.AST) and isinstance(new_value, ast.AST):
+                yield (old_value, new_value, sub)
+            elif isinstance(old_value, ast.AST):
+                yield EditOp("delete", sub, old_value, None)
+            elif isinstance(new_value, ast.AST):
+                yield EditOp("insert", sub, None, new_value)
+
+    def sequence(self, old: list, new: list, path: str) -> Iterator[_Task]:
+        digest = self.digest
+        regions = [(0, len(old), 0, len(new))]
+        while regions:
+            olo, ohi, nlo, nhi = regions.pop()
+            # Trim the common prefix and suffix before looking for anchors.
+            while olo < ohi and nlo < nhi and digest(old[olo]) == digest(new[nlo]):
+                olo, nlo = olo + 1, nlo + 1
+            while olo < ohi and nlo < nhi and digest(old[ohi - 1]) == digest(new[nhi - 1]):
+                ohi, nhi = ohi - 1, nhi - 1
+            anchors = self._anchors(old, olo, ohi, new, nlo, nhi) if olo < ohi and nlo < nhi else []
+            if not anchors:
+                yield from self._gap(old, olo, ohi, new, nlo, nhi, path)
+                continue
+            # Anchored items are identical; align the regions between them,
+            # pushed last first so that they are processed in order.
+            bounds = [(olo - 1, nlo - 1), *anchors, (ohi, nhi)]
+            for (i, j), (k, m) in reversed(list(zip(bounds, bounds[1:]))):
+                regions.append((i + 1, k, j + 1, m))
+
+    def _anchors(self, old, olo, ohi, new, nlo, nhi) -> list[tuple[int, int]]:
+        digest = self.digest
+        old_counts = Counter(digest(old[i]) for i in range(olo, ohi))
+        new_positions: dict[bytes, int] = {}
+        new_counts: Counter = Counter()
+        for j in range(nlo, nhi):
+            d = digest(new[j])
+            new_counts[d] += 1
+            new_positions[d] = j
+        candidates = [
+            (i, new_positions[d])
+            for i in range(olo, ohi)
+            if old_counts[d := digest(old[i])] == 1 and new_counts[d] == 1
+        ]
+        return _lis(candidates)
+
+    def _gap(self, old, olo, ohi, new, nlo, nhi, path) -> Iterator[_Task]:
+        """Diff a region without anchors: same-typed nodes are matched in order.
+
+        The match for an old node is looked for among the next
+        :data:`GAP_WINDOW` new nodes only, so that a region whose node types
+        all differ costs ``O(n)`` rather than ``O(n * m)``.  ``None`` items
+        (the key of ``**x`` in ``Dict.keys``) are placeholders, not nodes, and
+        are neither deleted nor inserted.
+        """
+        j = nlo
+        for i in range(olo, ohi):
+            end = min(nhi, j + GAP_WINDOW)
+            k = j
+            while k < end and type(new[k]) is not type(old[i]):
+                k += 1
+            if k == end:
+                if old[i] is not None:
+                    yield EditOp("delete", f"{path}[{i}]", old[i], None)
+                continue
+            yield from _inserts(new, j, k, path)
+            yield (old[i], new[k], f"{path}[{k}]")
+            j = k + 1
+        yield from _inserts(new, j, nhi, path)
+
+
+def _inserts(new: list, lo: int, hi: int, path: str) -> Iterator[EditOp]:
+    for m in range(lo, hi):
+        if new[m] is not None:
+            yield EditOp("insert", f"{path}[{m}]", None, new[m])
+
+
+def diff_trees(old: ast.AST, new: ast.AST) -> Iterator[EditOp]:
+    """Yield the edit operations turning ``old`` into ``new``.
+
+    Paths use the index of the new node for matched and inserted list items
+    and the index of the old node for deleted ones.
+    """
+    return _Differ().diff(old, new)
+
+
+def diff_files(old: Path, new: Path) -> Iterator[EditOp]:
+    return diff_trees(parse_file(old), parse_file(new))
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("files", nargs="*", help="a pair number, or an old and a new file")
+    parser.add_argument("--all", action="store_true", help="summarise every pair in --data")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    parser.add_argument("--json", action="store_true", help="print operations as JSON lines")
+    args = parser.parse_args(argv)
+
+    if args.all:
+        for pair in load_pairs(args.data):
+            counts = Counter(op.kind for op in diff_files(pair.bef_file, pair.aft_file))
+            print(pair.id, " ".join(f"{k}={counts[k]}" for k in sorted(counts)))
+        return 0
+    if len(args.files) == 1:
+        pair = load_pair(args.data / f"{args.files[0]}.json")
+        old, new = pair.bef_file, pair.aft_file
+    elif len(args.files) == 2:
+        old, new = map(Path, args.files)
+    else:
+        parser.error("expected a pair number, two files or --all")
+
+    for op in diff_files(old, new):
+        if args.json:
+            print(json.dumps(op.to_dict()))
+            continue
+        changes = ", ".join(f"{k}: {a!r} -> {b!r}" for k, (a, b) in op.fields.items())
+        lines = f"{op.old_line or '-'}:{op.new_line or '-'}"
+        print(f"{op.kind:8} {lines:>11} {op.path or '<module>'} {changes}".rstrip())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,218 @@
+"""Resumable batch migration of every pair.
+
+Runs a migration command on the before file of each pair and files its
+output under ``success/`` or ``fail/`` in the output directory, the layout of
+``result/llama``.  The command is a template; ``{bef}``, ``{descriptor}``,
+``{libo}``, ``{libn}``, ``{pair}`` and ``{out}`` are replaced, and the command
+must write the migrated file to ``{out}``::
+
+    python -m tools.batch result/mymodel --jobs 4 \\
+        --command "python migrate.py {bef} --from {libo} --to {libn} -o {out}"
+
+Placeholders follow :meth:`str.format`, so literal braces in the command are
+written ``{{`` and ``}}``.  The template is checked before any pair runs.
+
+The pairs are split into one shard per worker process.  Each worker appends
+a line to ``checkpoint.jsonl`` in the output directory as soon as a pair is
+done, so an interrupted batch picks up where it stopped when run again.
+Failed migrations are tagged with a category from ``result/README.md`` by
+:mod:`tools.classify`; a command that fails or writes nothing counts as
+``others``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import shlex
+import shutil
+import string
+import subprocess
+import sys
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from .benchmark import DATA_DIR, Pair, load_pairs
+from .cache import SourceCache
+from .classify import CATEGORIES, Classifier
+
+CHECKPOINT = "checkpoint.jsonl"
+FIELDS = ("bef", "descriptor", "libo", "libn", "pair", "out")
+
+
+def read_checkpoint(output_dir: Path) -> dict[str, dict]:
+    """Return the completed pairs recorded in ``output_dir``, by pair id."""
+    done = {}
+    try:
+        with open(Path(output_dir) / CHECKPOINT, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # torn last line of an interrupted run
+                done[record["pair"]] = record
+    except FileNotFoundError:
+        pass
+    return done
+
+
+def _append_checkpoint(output_dir: Path, record: dict) -> None:
+    # A single O_APPEND write keeps concurrent workers from interleaving lines.
+    line = (json.dumps(record) + "\n").encode()
+    fd = os.open(Path(output_dir) / CHECKPOINT, os.O_WRONLY | os.O_APPEND | os.O_CREAT, 0o644)
+    try:
+        os.write(fd, line)
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def parse_command(command: str) -> list[str]:
+    """Split a command template into arguments and check its placeholders.
+
+    Raises :class:`ValueError` for unbalanced quotes or braces and for
+    placeholders other than :data:`FIELDS`.
+    """
+    args = shlex.split(command)
+    if not args:
+        raise ValueError("empty command")
+    for arg in args:
+        try:
+            names = [name for _, name, _, _ in string.Formatter().parse(arg) if name is not None]
+        except ValueError as e:
+            raise ValueError(f"{arg!r}: {e} (write literal braces as {{{{ and }}}})") from None
+        for name in names:
+            if name not in FIELDS:
+                raise ValueError(
+                    f"unknown placeholder {{{name}}} in {arg!r} (write literal braces as {{{{ and }}}})"
+                )
+    return args
+
+
+def _run_command(pair: Pair, args: list[str], out: Path, timeout: float | None) -> dict:
+    fields = {
+        "bef": str(pair.bef_file),
+        "descriptor": str(pair.descriptor),
+        "libo": pair.libo,
+        "libn": pair.libn,
+        "pair": pair.id,
+        "out": str(out),
+    }
+    record = {"pair": pair.id}
+    try:
+        proc = subprocess.run(
+            [arg.format(**fields) for arg in args], capture_output=True, text=True, timeout=timeout
+        )
+    except subprocess.TimeoutExpired:
+        record["error"] = f"timed out after {timeout}s"
+    except OSError as e:
+        record["error"] = str(e)
+    else:
+        if proc.returncode:
+            record["error"] = f"exit status {proc.returncode}: {proc.stderr.strip()[-500:]}"
+    return record
+
+
+def migrate_pair(
+    pair: Pair, args: list[str], output_dir: Path, timeout: float | None, classifier: Classifier
+) -> dict:
+    """Migrate one pair, file the output and return its checkpoint record.
+
+    ``args`` is a command template as returned by :func:`parse_command`.
+    """
+    # The unfinished output is kept outside output_dir, where tools.evaluate
+    # and tools.classify would otherwise find it after an interrupted run.
+    with tempfile.TemporaryDirectory(prefix="pig-batch-") as tmp_dir:
+        out = Path(tmp_dir) / f"{pair.id}.py"
+        record = _run_command(pair, args, out, timeout)
+        if out.is_file():
+            verdict = classifier.classify(pair, out)
+            record["score"] = verdict["score"]
+            category = verdict["category"]
+        else:
+            record.setdefault("error", "no output written")
+            category = "others"
+        record["category"] = category
+        record["outcome"] = "success" if category is None else "fail"
+
+        for outcome in ("success", "fail"):
+            (output_dir / outcome / f"{pair.id}.py").unlink(missing_ok=True)
+        if out.is_file():
+            target = output_dir / record["outcome"] / f"{pair.id}.py"
+            target.parent.mkdir(exist_ok=True)
+            # Copy under a name that is not N.py, then rename: the temporary
+            # directory may be on another file system.
+            partial = target.with_name(f".{pair.id}.py.part")
+            shutil.copyfile(out, partial)
+            os.replace(partial, target)
+    _append_checkpoint(output_dir, record)
+    return record
+
+
+def _run_shard(
+    pairs: list[Pair], args: list[str], output_dir: Path, timeout: float | None, classifier: Classifier
+) -> list[dict]:
+    return [migrate_pair(pair, args, output_dir, timeout, classifier) for pair in pairs]
+
+
+def run_batch(
+    pairs: list[Pair],
+    command: str,
+    output_dir: Path,
+    jobs: int = 1,
+    timeout: float | None = None,
+    classifier: Classifier | None = None,
+) -> dict[str, dict]:
+    """Migrate every pair not yet in the checkpoint; return all records.
+
+    ``command`` is checked with :func:`parse_command` before any work starts.
+    """
+    args = parse_command(command)
+    classifier = classifier or Classifier(cache=SourceCache())
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    done = read_checkpoint(output_dir)
+    todo = [pair for pair in pairs if pair.id not in done]
+    shards = [todo[i::jobs] for i in range(jobs) if todo[i::jobs]]
+    if not shards:
+        return done
+    with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+        futures = [
+            pool.submit(_run_shard, shard, args, output_dir, timeout, classifier) for shard in shards
+        ]
+        for future in futures:
+            done.update((r["pair"], r) for r in future.result())
+    return done
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("output", type=Path, help="directory receiving success/ and fail/")
+    parser.add_argument("--command", required=True, help="migration command template")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    parser.add_argument("--pairs", nargs="+", metavar="N", help="only migrate these pairs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--timeout", type=float, help="seconds allowed per migration")
+    parser.add_argument("--restart", action="store_true", help="ignore the existing checkpoint")
+    args = parser.parse_args(argv)
+    try:
+        parse_command(args.command)
+    except ValueError as e:
+        parser.error(f"--command: {e}")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    if args.restart:
+        (args.output / CHECKPOINT).unlink(missing_ok=True)
+    pairs = load_pairs(args.data, args.pairs)
+    records = run_batch(pairs, args.command, args.output, args.jobs, args.timeout)
+    counts = Counter(records[p.id]["category"] or "success" for p in pairs)
+    print(", ".join(f"{k}: {counts[k]}" for k in ("success", *CATEGORIES) if counts[k]))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,89 @@
+"""Access to the migration pairs described by ``data/*.json``."""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from dataclasses import dataclass
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+DATA_DIR = ROOT / "data"
+RESULT_DIR = ROOT / "result"
+
+
+@dataclass(frozen=True)
+class Pair:
+    """One benchmark entry: a descriptor plus its before/after files."""
+
+    id: str
+    domain: str
+    url: str
+    bef_file: Path
+    aft_file: Path
+    libo: str
+    libn: str
+    apio: tuple[str, ...]
+    apin: tuple[str, ...]
+    api_imports: tuple[str, ...]
+    filepath: str
+    yaml: str
+    descriptor: Path
+
+
+def load_pair(descriptor: Path) -> Pair:
+    """Read a single ``N.json`` descriptor."""
+    descriptor = Path(descriptor)
+    with open(descriptor, encoding="utf-8") as f:
+        raw = json.load(f)
+    return Pair(
+        id=descriptor.stem,
+        domain=raw["domain"],
+        url=raw["url"],
+        bef_file=descriptor.parent / raw["bef_file"],
+        aft_file=descriptor.parent / raw["aft_file"],
+        libo=raw["libo"],
+        libn=raw["libn"],
+        apio=tuple(raw["apio"]),
+        apin=tuple(raw["apin"]),
+        api_imports=tuple(raw["api_imports"]),
+        filepath=raw["filepath"],
+        yaml=raw["yaml"],
+        descriptor=descriptor,
+    )
+
+
+def _pair_key(path: Path) -> tuple[int, str]:
+    return (int(path.stem), path.stem) if path.stem.isdigit() else (0, path.stem)
+
+
+def load_pairs(data_dir: Path = DATA_DIR, ids: list[str] | None = None) -> list[Pair]:
+    """Load every descriptor in ``data_dir``, ordered by pair number.
+
+    If ``ids`` is given only those pairs are loaded.
+    """
+    data_dir = Path(data_dir)
+    if ids is not None:
+        paths = [data_dir / f"{i}.json" for i in ids]
+    else:
+        paths = sorted(data_dir.glob("*.json"), key=_pair_key)
+    return [load_pair(p) for p in paths]
+
+
+def find_candidate(candidate_dir: Path, pair_id: str) -> Path | None:
+    """Locate ``<pair_id>.py`` in a candidate output directory.
+
+    Result directories such as ``result/llama`` keep outputs in ``success/``
+    and ``fail/`` subdirectories, so the lookup falls back to a recursive
+    search when the file is not at the top level.
+    """
+    candidate_dir = Path(candidate_dir)
+    direct = candidate_dir / f"{pair_id}.py"
+    if direct.is_file():
+        return direct
+    return next(iter(sorted(candidate_dir.rglob(f"{pair_id}.py"))), None)
+
+
+def file_digest(path: Path) -> str:
+    """Return the SHA-256 hex digest of a file's content."""
+    return hashlib.sha256(Path(path).read_bytes()).hexdigest()
@@ -0,0 +1,134 @@
+"""On-disk cache of facts derived from parsed source files.
+
+Unpickling a whole AST costs about as much as parsing the file again, so the
+cache does not store trees: it stores what the tools compute from them (the
+imported packages and used names, the sites of some APIs, ...), which are
+small and load in a fraction of the parse time.  Entries are keyed by the
+SHA-256 of the file content, the running Python version (whose grammar the
+file was parsed with) and the kind of fact, so a file is parsed again only
+when its content changes, whatever its path.  The cache directory is bounded
+in size: once it grows past ``max_bytes`` the least recently used entries are
+removed until it is back under three quarters of the limit.  The directory is
+only scanned when the size estimate kept by the instance (the size found at
+the last scan plus what it has stored since) goes over the limit, so entries
+written by other processes are noticed late.  Several processes may share one
+cache directory; entries are written atomically.  ``hits`` and ``misses``
+count the lookups served from and missed by this instance; a copy sent to a
+worker process counts apart, so :func:`tools.evaluate.score_pair` reports the
+lookups of each call.
+"""
+
+from __future__ import annotations
+
+import ast
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+from pathlib import Path
+from typing import Callable, TypeVar
+
+from .benchmark import ROOT
+
+DEFAULT_CACHE_DIR = ROOT / ".pig_cache" / "source"
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Eviction frees space down to this fraction of max_bytes, so that the next
+# stores do not trigger another scan right away.
+_LOW_WATER = 0.75
+
+_TAG = "py%d%d" % sys.version_info[:2]
+
+T = TypeVar("T")
+
+
+class SourceCache:
+    """Content-addressed cache of values derived from source files."""
+
+    def __init__(self, directory: Path = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Estimated size of the directory; None until it is first scanned.
+        self._size: int | None = None
+
+    def derived(self, path: Path, kind: str, derive: Callable[[ast.Module], T]) -> T:
+        """Return ``derive`` applied to the parsed module for ``path``.
+
+        ``kind`` names what ``derive`` computes and is part of the cache key,
+        so it must change whenever ``derive`` does.  Syntax errors are not
+        cached and propagate as with :func:`ast.parse`.
+        """
+        data = Path(path).read_bytes()
+        return self._get(data, kind, lambda: derive(ast.parse(data, filename=str(path))))
+
+    def stats(self) -> str:
+        """Describe the lookups made so far, for verbose output."""
+        total = self.hits + self.misses
+        rate = self.hits / total if total else 0.0
+        return f"parse cache: {self.hits} hits, {self.misses} misses ({rate:.0%} hit rate)"
+
+    def clear(self) -> None:
+        """Remove every cache entry."""
+        for entry in self._entries():
+            entry.unlink(missing_ok=True)
+        self._size = None
+
+    def _get(self, data: bytes, kind: str, build):
+        entry = self.directory / f"{hashlib.sha256(data).hexdigest()}.{_TAG}.{kind}"
+        try:
+            with open(entry, "rb") as f:
+                value = pickle.load(f)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            self.misses += 1
+            value = build()
+            try:
+                self._store(entry, value)
+            except (pickle.PicklingError, AttributeError, RecursionError, TypeError):
+                pass  # e.g. a local function or too deeply nested; still a valid value
+        else:
+            self.hits += 1
+            # The modification time doubles as the last-use time for eviction.
+            try:
+                os.utime(entry)
+            except FileNotFoundError:
+                pass  # evicted by another process since it was read
+        return value
+
+    def _store(self, entry: Path, value) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            os.replace(tmp, entry)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        if self._size is None or self._size + size > self.max_bytes:
+            self._evict()
+        else:
+            self._size += size
+
+    def _entries(self) -> list[Path]:
+        if not self.directory.is_dir():
+            return []
+        return [p for p in self.directory.iterdir() if p.suffix != ".tmp"]
+
+    def _evict(self) -> None:
+        stats = []
+        for entry in self._entries():
+            try:
+                stats.append((entry.stat(), entry))
+            except FileNotFoundError:
+                continue
+        total = sum(st.st_size for st, _ in stats)
+        if total > self.max_bytes:
+            for st, entry in sorted(stats, key=lambda item: item[0].st_mtime):
+                if total <= self.max_bytes * _LOW_WATER:
+                    break
+                entry.unlink(missing_ok=True)
+                total -= st.st_size
+        self._size = total
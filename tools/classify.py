@@ -0,0 +1,139 @@
+"""Failure-category classifier for candidate migrations.
+
+A candidate is checked for syntax validity, for still importing ``libo`` or
+not importing ``libn``, and for still using ``apio`` or missing ``apin``
+names (see :func:`tools.evaluate.score_pair`).  The verdict is one of the
+categories of ``result/README.md``, or ``None`` for a successful migration:
+
+* ``wrong_api`` -- Using Wrong API
+* ``wrong_library`` -- Using Wrong Library
+* ``parse_error`` -- Parsing Error (Syntax Error)
+* ``semantic_error`` -- Semantic Error (never assigned automatically)
+* ``others`` -- Others, e.g. no candidate was produced
+
+Verdicts are memoised on disk by the content hashes of the candidate and of
+the pair's descriptor, before and after files, so re-classifying unchanged
+candidates costs one hash each::
+
+    python -m tools.classify result/llama
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+from .benchmark import DATA_DIR, ROOT, Pair, find_candidate, load_pairs
+from .cache import SourceCache
+from .evaluate import score_pair
+
+CATEGORIES = ("wrong_api", "wrong_library", "parse_error", "semantic_error", "others")
+DEFAULT_VERDICT_DIR = ROOT / ".pig_cache" / "verdicts"
+# Bump when the rules below or the checks of score_pair change so memoised
+# verdicts are not reused.
+CLASSIFIER_VERSION = 2
+
+
+def categorize(result: dict) -> str | None:
+    """Return the failure category of a :func:`~tools.evaluate.score_pair` result.
+
+    ``None`` means the candidate matches the reference migration.
+    """
+    if result["status"] == "syntax_error":
+        return "parse_error"
+    if result["status"] != "ok":
+        return "others"
+    if result["old_imports_left"] or result["new_imports_missing"]:
+        return "wrong_library"
+    if result["old_apis_left"] or result["new_apis_missing"]:
+        return "wrong_api"
+    return None
+
+
+class Classifier:
+    """Classify candidates, memoising verdicts in ``directory``."""
+
+    def __init__(self, directory: Path = DEFAULT_VERDICT_DIR, cache: SourceCache | None = None):
+        self.directory = Path(directory)
+        self.cache = cache
+        self.hits = 0
+        self.misses = 0
+        self._references: dict[str, str] = {}
+
+    def _reference_digest(self, pair: Pair) -> str:
+        digest = self._references.get(pair.id)
+        if digest is None:
+            h = hashlib.sha256(str(CLASSIFIER_VERSION).encode())
+            for path in (pair.descriptor, pair.bef_file, pair.aft_file):
+                h.update(path.read_bytes())
+            digest = self._references[pair.id] = h.hexdigest()
+        return digest
+
+    def classify(self, pair: Pair, candidate: Path | None) -> dict:
+        """Return the verdict for ``candidate`` as a migration of ``pair``.
+
+        The verdict holds the ``category``, the ``score`` and the individual
+        checks of :func:`~tools.evaluate.score_pair`.
+        """
+        if candidate is None:
+            return {"pair": pair.id, "candidate": None, "category": "others", "score": 0.0}
+        data = Path(candidate).read_bytes()
+        key = hashlib.sha256(data + self._reference_digest(pair).encode()).hexdigest()
+        entry = self.directory / f"{key}.json"
+        try:
+            with open(entry, encoding="utf-8") as f:
+                verdict = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            result = score_pair(pair, Path(candidate), self.cache)
+            verdict = {k: v for k, v in result.items() if k not in ("pair", "candidate", "cache")}
+            verdict["category"] = categorize(result)
+            self._store(entry, verdict)
+        else:
+            self.hits += 1
+        return {"pair": pair.id, "candidate": str(candidate), **verdict}
+
+    def stats(self) -> str:
+        """Describe the verdict and parse cache lookups, for verbose output."""
+        line = f"verdict cache: {self.hits} hits, {self.misses} misses"
+        return f"{line}; {self.cache.stats()}" if self.cache is not None else line
+
+    def _store(self, entry: Path, verdict: dict) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(verdict, f)
+        os.replace(tmp, entry)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("candidates", type=Path, help="directory of N.py outputs")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    parser.add_argument("--pairs", nargs="+", metavar="N", help="only classify these pairs")
+    parser.add_argument("--json", action="store_true", help="print full verdicts as JSON lines")
+    parser.add_argument("-v", "--verbose", action="store_true", help="report cache statistics")
+    args = parser.parse_args(argv)
+
+    classifier = Classifier(cache=SourceCache())
+    for pair in load_pairs(args.data, args.pairs):
+        candidate = find_candidate(args.candidates, pair.id)
+        if candidate is None:
+            continue
+        verdict = classifier.classify(pair, candidate)
+        if args.json:
+            print(json.dumps(verdict))
+        else:
+            print(f"{pair.id:>4} {verdict['category'] or 'success':15} {candidate}")
+    if args.verbose:
+        print(classifier.stats(), file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,428 @@
+"""Score a directory of migrated files against the benchmark.
+
+A candidate directory holds one ``N.py`` per pair (nested directories such as
+``success/`` and ``fail/`` are searched too).  Each candidate is compared with
+the reference migration ``Na.py`` of its pair:
+
+* **imports** -- packages of ``libo`` that the reference migration dropped
+  must be gone and the packages of ``libn`` it imports must be imported;
+* **APIs** -- ``apin`` names used by the reference must appear and ``apio``
+  names the reference got rid of must not.
+
+The score of a pair is the mean of the two checks, so ``1.0`` means the
+candidate matches the reference on both.  Pairs are scored on a process pool
+and printed as JSON lines in completion order (``--ordered`` prints them in
+pair order)::
+
+    python -m tools.evaluate result/llama --jobs 8
+
+With ``--incremental`` the inputs of every pair are recorded in a manifest
+and later runs only re-score the pairs whose files changed.  ``--profile``
+writes the time spent in each scoring stage, per pair and in total.
+"""
+
+from __future__ import annotations
+
+import argparse
+import ast
+import hashlib
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from contextlib import closing, contextmanager, nullcontext
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from .benchmark import DATA_DIR, ROOT, Pair, file_digest, find_candidate, load_pairs
+from .cache import DEFAULT_CACHE_DIR, SourceCache
+
+MANIFEST_DIR = ROOT / ".pig_cache" / "manifests"
+# Bump when the scoring rules change so stored results are not reused.
+MANIFEST_VERSION = 2
+
+# Result entries that describe one run rather than the candidate; they are
+# neither stored in manifests nor printed.
+_RUN_FIELDS = ("timings", "cache")
+
+_IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+
+
+def parse_file(path: Path) -> ast.Module:
+    """Parse a Python source file, honouring its encoding declaration."""
+    return ast.parse(Path(path).read_bytes(), filename=str(path))
+
+
+def imported_packages(tree: ast.AST) -> set[str]:
+    """Return the top-level package names imported anywhere in ``tree``."""
+    packages = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            packages.update(alias.name.split(".")[0] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            packages.add(node.module.split(".")[0])
+    return packages
+
+
+def used_names(tree: ast.AST) -> set[str]:
+    """Return identifiers referenced as names, attributes or imported names."""
+    names = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            names.add(node.id)
+        elif isinstance(node, ast.Attribute):
+            names.add(node.attr)
+        elif isinstance(node, ast.alias):
+            names.update(node.name.split("."))
+        elif isinstance(node, ast.keyword) and node.arg:
+            names.add(node.arg)
+    return names
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[-.]", "_", name.lower())
+
+
+def library_packages(packages: set[str], library: str, imports: Iterable[str] = ()) -> set[str]:
+    """Return the members of ``packages`` that belong to ``library``.
+
+    Distribution names rarely equal import names (``kafka-python`` is
+    ``kafka``, ``RPi.GPIO`` is ``RPi``), so a package matches when it equals
+    the library name or is a ``_``-separated prefix or suffix of it.  Modules
+    listed in ``imports`` always match.
+    """
+    lib = _normalize(library)
+    known = {_normalize(i.split(".")[0]) for i in imports}
+    return {
+        pkg
+        for pkg in packages
+        if (norm := _normalize(pkg)) in known
+        or norm == lib
+        or lib.startswith(norm + "_")
+        or lib.endswith("_" + norm)
+    }
+
+
+def api_names(apis: Iterable[str]) -> set[str]:
+    """Split descriptor API entries into plain identifiers.
+
+    Entries are not always identifiers (``parents-parent``,
+    ``TweepError['message']``), so every identifier-like token counts.
+    """
+    return {name for api in apis for name in _IDENTIFIER.findall(api)}
+
+
+# Cache kind of _summary; bump the suffix when either function it calls changes.
+_SUMMARY = "summary1"
+
+
+def _summary(tree: ast.AST) -> tuple[set[str], set[str]]:
+    return imported_packages(tree), used_names(tree)
+
+
+def _summarize(path: Path, cache: SourceCache | None) -> tuple[set[str], set[str]]:
+    if cache is None:
+        return _summary(parse_file(path))
+    return cache.derived(path, _SUMMARY, _summary)
+
+
+def _ratio(hits: int, total: int) -> float:
+    return hits / total if total else 1.0
+
+
+class StageTimer:
+    """Accumulates wall time and call count per named stage.
+
+    Use an instance as a context manager factory, ``with timer("parse"):``.
+    """
+
+    def __init__(self):
+        self.stages: dict[str, dict[str, float]] = {}
+
+    @contextmanager
+    def __call__(self, stage: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(stage, time.perf_counter() - start)
+
+    def add(self, stage: str, seconds: float, calls: int = 1) -> None:
+        entry = self.stages.setdefault(stage, {"seconds": 0.0, "calls": 0})
+        entry["seconds"] += seconds
+        entry["calls"] += calls
+
+    def merge(self, stages: dict[str, dict[str, float]]) -> None:
+        """Add the stages recorded by another timer, e.g. in a worker."""
+        for stage, entry in stages.items():
+            self.add(stage, entry["seconds"], entry["calls"])
+
+
+def _untimed(stage: str):
+    return nullcontext()
+
+
+def score_pair(
+    pair: Pair, candidate: Path | None, cache: SourceCache | None = None, profile: bool = False
+) -> dict:
+    """Score one candidate file against ``pair``'s reference migration.
+
+    The imports and names of each file are taken from ``cache`` when one is
+    given, so unchanged files are not parsed again.  With
+    ``profile``, the result has a ``timings`` entry with the time spent in
+    each stage of the scoring.  With a ``cache``, the result has a ``cache``
+    entry counting the ``hits`` and ``misses`` of this call, since a cache
+    sent to a worker process does not report back.
+    """
+    timer = StageTimer() if profile else None
+    stage = timer or _untimed
+    result = {"pair": pair.id, "candidate": str(candidate) if candidate else None}
+
+    lookups = (cache.hits, cache.misses) if cache is not None else None
+
+    def finish(**fields) -> dict:
+        if timer is not None:
+            fields["timings"] = timer.stages
+        if lookups is not None:
+            fields["cache"] = {"hits": cache.hits - lookups[0], "misses": cache.misses - lookups[1]}
+        return {**result, **fields}
+
+    if candidate is None:
+        return finish(status="missing", score=0.0)
+    try:
+        with stage("parse_candidate"):
+            cand_pkgs, cand_names = _summarize(candidate, cache)
+    except (SyntaxError, ValueError, RecursionError) as e:
+        return finish(status="syntax_error", error=str(e), score=0.0)
+
+    with stage("parse_reference"):
+        bef_pkgs, bef_names = _summarize(pair.bef_file, cache)
+        aft_pkgs, aft_names = _summarize(pair.aft_file, cache)
+
+    with stage("imports"):
+        # Some distributions share no word with their import name
+        # (pycryptodome is Crypto, attrs is attr); the packages the reference
+        # migration dropped then stand for the old library.
+        old_pkgs = library_packages(bef_pkgs - aft_pkgs, pair.libo) or bef_pkgs - aft_pkgs
+        new_pkgs = library_packages(aft_pkgs, pair.libn, pair.api_imports)
+        old_left = sorted(old_pkgs & cand_pkgs)
+        new_missing = sorted(new_pkgs - cand_pkgs)
+
+    with stage("apis"):
+        expected_apis = api_names(pair.apin) & aft_names
+        stale_apis = (api_names(pair.apio) & bef_names) - aft_names
+        apis_missing = sorted(expected_apis - cand_names)
+        apis_left = sorted(stale_apis & cand_names)
+
+    import_score = _ratio(
+        len(old_pkgs) + len(new_pkgs) - len(old_left) - len(new_missing),
+        len(old_pkgs) + len(new_pkgs),
+    )
+    api_score = _ratio(
+        len(expected_apis) + len(stale_apis) - len(apis_missing) - len(apis_left),
+        len(expected_apis) + len(stale_apis),
+    )
+    return finish(
+        status="ok",
+        score=round((import_score + api_score) / 2, 4),
+        import_score=round(import_score, 4),
+        api_score=round(api_score, 4),
+        old_imports_left=old_left,
+        new_imports_missing=new_missing,
+        new_apis_missing=apis_missing,
+        old_apis_left=apis_left,
+    )
+
+
+def profile_report(results: Iterable[dict], wall_seconds: float) -> dict:
+    """Summarise the ``timings`` of profiled results.
+
+    Results replayed from a manifest carry no timings and are only counted.
+    """
+    total = StageTimer()
+    pairs = {}
+    replayed = 0
+    for result in results:
+        if "timings" not in result:
+            replayed += 1
+            continue
+        total.merge(result["timings"])
+        pairs[result["pair"]] = result["timings"]
+    return {"wall_seconds": wall_seconds, "replayed": replayed, "stages": total.stages, "pairs": pairs}
+
+
+def _pair_inputs(pair: Pair, candidate: Path | None) -> dict[str, str | None]:
+    # The path is part of the result, so a candidate moved between success/
+    # and fail/ with the same content must not replay the old one.
+    return {
+        "descriptor": file_digest(pair.descriptor),
+        "bef": file_digest(pair.bef_file),
+        "aft": file_digest(pair.aft_file),
+        "candidate": file_digest(candidate) if candidate else None,
+        "candidate_path": str(Path(candidate).resolve()) if candidate else None,
+    }
+
+
+def default_manifest(candidate_dir: Path) -> Path:
+    """Return the manifest location used for ``candidate_dir`` by default."""
+    resolved = str(Path(candidate_dir).resolve())
+    digest = hashlib.sha256(resolved.encode()).hexdigest()[:12]
+    return MANIFEST_DIR / f"{Path(resolved).name}-{digest}.json"
+
+
+def load_manifest(path: Path) -> dict:
+    try:
+        with open(path, encoding="utf-8") as f:
+            manifest = json.load(f)
+    except FileNotFoundError:
+        return {}
+    return manifest if manifest.get("version") == MANIFEST_VERSION else {}
+
+
+def save_manifest(path: Path, entries: dict) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_suffix(".tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"version": MANIFEST_VERSION, "pairs": entries}, f)
+    os.replace(tmp, path)
+
+
+def _input_size(pair: Pair, candidate: Path | None) -> int:
+    files = (pair.bef_file, pair.aft_file, candidate)
+    return sum(path.stat().st_size for path in files if path is not None)
+
+
+def _score_pairs(
+    todo: list[tuple[Pair, Path | None]],
+    jobs: int | None,
+    cache: SourceCache | None,
+    manifest: Path | None,
+    profile: bool,
+) -> Iterator[dict]:
+    entries = {}
+    if manifest is not None:
+        entries = load_manifest(manifest).get("pairs", {})
+        stale = []
+        for pair, candidate in todo:
+            inputs = _pair_inputs(pair, candidate)
+            entry = entries.get(pair.id)
+            if entry is not None and entry["inputs"] == inputs:
+                yield entry["result"]
+            else:
+                entries[pair.id] = {"inputs": inputs, "result": None}
+                stale.append((pair, candidate))
+        todo = stale
+    if not todo:
+        return
+
+    # Largest first, so that a big pair does not start last and hold up the run.
+    todo = sorted(todo, key=lambda item: _input_size(*item), reverse=True)
+    pool = ProcessPoolExecutor(max_workers=jobs)
+    try:
+        futures = [
+            pool.submit(score_pair, pair, candidate, cache, profile) for pair, candidate in todo
+        ]
+        for future in as_completed(futures):
+            result = future.result()
+            if manifest is not None:
+                stored = {k: v for k, v in result.items() if k not in _RUN_FIELDS}
+                entries[result["pair"]]["result"] = stored
+            yield result
+    finally:
+        # When the caller stops early, drop the queued pairs rather than
+        # scoring them; only the ones already running are waited for.
+        pool.shutdown(wait=True, cancel_futures=True)
+        if manifest is not None:
+            save_manifest(manifest, {k: v for k, v in entries.items() if v["result"] is not None})
+
+
+def evaluate(
+    pairs: Iterable[Pair],
+    candidate_dir: Path,
+    jobs: int | None = None,
+    cache: SourceCache | None = None,
+    manifest: Path | None = None,
+    ordered: bool = False,
+    profile: bool = False,
+) -> Iterator[dict]:
+    """Score every pair on a process pool, yielding results as they finish.
+
+    With a ``manifest``, only pairs whose descriptor, before, after or
+    candidate file changed since the manifest was written are scored again;
+    the stored results of the others are yielded first.  The manifest is
+    updated even if the run is interrupted.
+
+    With ``ordered``, results are yielded in the order of ``pairs`` instead,
+    each one as soon as every pair before it is done.  ``profile`` is passed
+    on to :func:`score_pair`; see :func:`profile_report`.
+    """
+    todo = [(pair, find_candidate(candidate_dir, pair.id)) for pair in pairs]
+    with closing(_score_pairs(todo, jobs, cache, manifest, profile)) as results:
+        if not ordered:
+            yield from results
+            return
+        order = [pair.id for pair, _ in todo]
+        done: dict[str, dict] = {}
+        position = 0
+        for result in results:
+            done[result["pair"]] = result
+            while position < len(order) and order[position] in done:
+                yield done.pop(order[position])
+                position += 1
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("candidates", type=Path, help="directory of N.py outputs")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    parser.add_argument("--pairs", nargs="+", metavar="N", help="only score these pairs")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument("--cache-dir", type=Path, default=DEFAULT_CACHE_DIR, help="parse cache directory")
+    parser.add_argument("--no-cache", action="store_true", help="always parse files from scratch")
+    parser.add_argument(
+        "-i", "--incremental", action="store_true", help="only re-score pairs whose inputs changed"
+    )
+    parser.add_argument("--manifest", type=Path, help="manifest file for --incremental")
+    parser.add_argument(
+        "--ordered", action="store_true", help="print results in pair order instead of as they finish"
+    )
+    parser.add_argument("--profile", type=Path, metavar="FILE", help="write stage timings as JSON")
+    parser.add_argument("-v", "--verbose", action="store_true", help="report cache statistics")
+    args = parser.parse_args(argv)
+    if not args.candidates.is_dir():
+        parser.error(f"{args.candidates} is not a directory")
+    if args.jobs < 1:
+        parser.error("--jobs must be at least 1")
+
+    cache = None if args.no_cache else SourceCache(args.cache_dir)
+    manifest = None
+    if args.incremental:
+        manifest = args.manifest or default_manifest(args.candidates)
+    pairs = load_pairs(args.data, args.pairs)
+    total = 0.0
+    results = []
+    start = time.perf_counter()
+    for result in evaluate(
+        pairs, args.candidates, args.jobs, cache, manifest, args.ordered, args.profile is not None
+    ):
+        total += result["score"]
+        results.append(result)
+        if cache is not None and "cache" in result:
+            # Workers count lookups on their own copies; add them up here.
+            cache.hits += result["cache"]["hits"]
+            cache.misses += result["cache"]["misses"]
+        print(json.dumps({k: v for k, v in result.items() if k not in _RUN_FIELDS}), flush=True)
+    print(f"{len(pairs)} pairs, mean score {total / max(len(pairs), 1):.3f}", file=sys.stderr)
+    if args.verbose and cache is not None:
+        print(cache.stats(), file=sys.stderr)
+    if args.profile is not None:
+        with open(args.profile, "w", encoding="utf-8") as f:
+            json.dump(profile_report(results, time.perf_counter() - start), f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
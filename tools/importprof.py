@@ -0,0 +1,134 @@
+"""Import-time profile of the benchmark files.
+
+Every before and after file is executed in a fresh interpreter with an import
+hook that records, for each module imported, the inclusive and self time and
+(with ``--memory``) the memory allocated while it was executed.  The files'
+top-level code really runs (only ``if __name__ == "__main__"`` blocks are
+skipped), so the child's working directory is a temporary one: files the
+code writes or reads by relative path never touch the checkout.  Packages the
+file imports that are not installed are replaced by stub modules generated on
+access, so the remaining imports are still measured; relative imports are
+stubbed the same way.  A file still running after ``--timeout`` seconds
+(some scripts poll forever) is stopped, and the imports it made until then
+are reported.  The report ranks the pairs by how much startup time the
+migration added::
+
+    python -m tools.importprof --pairs 20 176 149 293
+    python -m tools.importprof --json > import-profile.jsonl
+
+Stubbed modules cost next to nothing, so a pair whose new library is missing
+here under-reports its cost; stubs are flagged in the report.  The child
+interpreter starts from a minimal bootstrap (see :mod:`tools._importhook`),
+but modules every interpreter loads at startup (``os``, ``io``, ``codecs``,
+...) cannot be measured; the packages affected are listed as ``preloaded``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+from .benchmark import DATA_DIR, load_pairs
+from .evaluate import imported_packages, parse_file
+
+DEFAULT_TIMEOUT = 30.0
+# Seconds a child may overrun its own timeout before it is killed.
+_KILL_GRACE = 10.0
+
+_HOOK = Path(__file__).with_name("_importhook.py")
+# Runs _importhook.py as __main__ without importing the tools package.
+_BOOTSTRAP = (
+    "import sys; sys.argv[:] = sys.argv[1:]; "
+    "exec(compile(open(sys.argv[0], 'rb').read(), sys.argv[0], 'exec'))"
+)
+
+
+def run_profile(path: Path, memory: bool = False, timeout: float = DEFAULT_TIMEOUT) -> dict:
+    """Profile ``path`` in a fresh interpreter.
+
+    The file is parsed here; the child only receives the packages it imports,
+    so that it does not have to load the parser and the rest of :mod:`tools`.
+    The child stops the file after ``timeout`` seconds and still reports the
+    imports measured until then; it is killed if it does not exit soon after.
+    """
+    try:
+        packages = imported_packages(parse_file(path))
+    except (SyntaxError, ValueError) as e:
+        return {"file": str(path), "error": f"{type(e).__name__}: {e}", "modules": []}
+    cmd = [sys.executable, "-c", _BOOTSTRAP, str(_HOOK), str(path)]
+    cmd += ["1" if memory else "0", str(timeout), *sorted(packages)]
+    try:
+        with tempfile.TemporaryDirectory(prefix="pig-importprof-") as cwd:
+            proc = subprocess.run(
+                cmd, cwd=cwd, capture_output=True, text=True, timeout=timeout + _KILL_GRACE
+            )
+    except subprocess.TimeoutExpired:
+        return {"file": str(path), "error": f"timed out after {timeout}s", "modules": []}
+    lines = proc.stdout.strip().splitlines()
+    if proc.returncode or not lines:
+        reason = proc.stderr.strip().splitlines()[-1:] or [f"exit status {proc.returncode}"]
+        return {"file": str(path), "error": reason[0], "modules": []}
+    # The benchmark file may print on its own; the profile is the last line.
+    return json.loads(lines[-1])
+
+
+def _summary(profile: dict, top: int) -> list[str]:
+    modules = sorted(profile["modules"], key=lambda r: r["self_s"], reverse=True)
+    lines = []
+    for record in modules[:top]:
+        stub = " (stub)" if record["stub"] else ""
+        memory = f" {record['memory_bytes'] / 1024:8.0f} KiB" if "memory_bytes" in record else ""
+        lines.append(f"      {record['self_s'] * 1000:8.1f} ms{memory}  {record['module']}{stub}")
+    return lines
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pairs", nargs="+", metavar="N", help="only profile these pairs")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    parser.add_argument("--memory", action="store_true", help="also trace memory (slows imports)")
+    parser.add_argument("--top", type=int, default=5, help="modules listed per file")
+    parser.add_argument(
+        "--timeout", type=float, default=DEFAULT_TIMEOUT, help="seconds each file may run"
+    )
+    parser.add_argument("--json", action="store_true", help="print one JSON line per pair")
+    args = parser.parse_args(argv)
+
+    reports = []
+    for pair in load_pairs(args.data, args.pairs):
+        bef = run_profile(pair.bef_file, args.memory, args.timeout)
+        aft = run_profile(pair.aft_file, args.memory, args.timeout)
+        report = {
+            "pair": pair.id,
+            "libo": pair.libo,
+            "libn": pair.libn,
+            "added_s": aft.get("import_s", 0.0) - bef.get("import_s", 0.0),
+            "before": bef,
+            "after": aft,
+        }
+        if args.json:
+            print(json.dumps(report), flush=True)
+        reports.append(report)
+    if args.json:
+        return 0
+
+    for report in sorted(reports, key=lambda r: r["added_s"], reverse=True):
+        print(f"{report['pair']:>4} {report['libo']} -> {report['libn']}: "
+              f"{report['added_s'] * 1000:+.1f} ms import time")
+        for side in ("before", "after"):
+            profile = report[side]
+            print(f"    {side}: {Path(profile['file']).name} "
+                  f"{profile.get('import_s', 0.0) * 1000:.1f} ms"
+                  + (f"  preloaded: {', '.join(profile['preloaded'])}" if profile.get("preloaded") else "")
+                  + (f"  [{profile['error']}]" if profile.get("error") else ""))
+            for line in _summary(profile, args.top):
+                print(line)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
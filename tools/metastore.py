@@ -0,0 +1,161 @@
+"""Single-file columnar store of all pair descriptors.
+
+``build`` packs every ``data/N.json`` into one JSON document laid out by
+column.  ``domain``, ``libo`` and ``libn`` are dictionary encoded (a table of
+distinct values plus one code per row) and each has a precomputed index from
+value to rows, so loading the store is a single ``open()`` and a filter costs
+a dictionary lookup per criterion plus the matching rows::
+
+    python -m tools.metastore build
+    python -m tools.metastore query --domain "HTTP Clients" --libn requests
+
+Domains such as ``Web Framework&HTTP Clients`` are indexed under each of
+their ``&``-separated parts as well as under the full value.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+from typing import Iterable
+
+from .benchmark import DATA_DIR, ROOT, Pair, load_pairs
+
+DEFAULT_STORE = ROOT / ".pig_cache" / "metadata.json"
+STORE_VERSION = 1
+
+ENCODED_COLUMNS = ("domain", "libo", "libn")
+PLAIN_COLUMNS = ("id", "url", "bef_file", "aft_file", "apio", "apin", "api_imports", "filepath", "yaml")
+
+
+def _index_keys(column: str, value: str) -> set[str]:
+    if column == "domain":
+        return {value, *(part.strip() for part in value.split("&"))}
+    return {value}
+
+
+def build_store(pairs: Iterable[Pair]) -> dict:
+    """Pack ``pairs`` into the columnar layout."""
+    pairs = list(pairs)
+    columns: dict[str, object] = {
+        "id": [p.id for p in pairs],
+        "url": [p.url for p in pairs],
+        "bef_file": [p.bef_file.name for p in pairs],
+        "aft_file": [p.aft_file.name for p in pairs],
+        "apio": [list(p.apio) for p in pairs],
+        "apin": [list(p.apin) for p in pairs],
+        "api_imports": [list(p.api_imports) for p in pairs],
+        "filepath": [p.filepath for p in pairs],
+        "yaml": [p.yaml for p in pairs],
+    }
+    indexes: dict[str, dict[str, list[int]]] = {}
+    for column in ENCODED_COLUMNS:
+        values = sorted({getattr(p, column) for p in pairs})
+        code = {value: i for i, value in enumerate(values)}
+        columns[column] = {"values": values, "codes": [code[getattr(p, column)] for p in pairs]}
+        index = indexes[column] = {}
+        for row, pair in enumerate(pairs):
+            for key in _index_keys(column, getattr(pair, column)):
+                index.setdefault(key, []).append(row)
+    return {"version": STORE_VERSION, "rows": len(pairs), "columns": columns, "indexes": indexes}
+
+
+def save_store(store: dict, path: Path = DEFAULT_STORE) -> None:
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(store, f, separators=(",", ":"))
+
+
+class MetadataStore:
+    """Read access to a store written by :func:`save_store`."""
+
+    def __init__(self, store: dict, data_dir: Path = DATA_DIR):
+        if store.get("version") != STORE_VERSION:
+            raise ValueError("unsupported metadata store version; rebuild it")
+        self._columns = store["columns"]
+        self._indexes = store["indexes"]
+        self.data_dir = Path(data_dir)
+        self.rows = store["rows"]
+
+    @classmethod
+    def load(cls, path: Path = DEFAULT_STORE, data_dir: Path = DATA_DIR) -> "MetadataStore":
+        with open(path, encoding="utf-8") as f:
+            return cls(json.load(f), data_dir)
+
+    def value(self, column: str, row: int):
+        """Return the value of ``column`` in ``row``, decoding if needed."""
+        data = self._columns[column]
+        if column in ENCODED_COLUMNS:
+            return data["values"][data["codes"][row]]
+        return data[row]
+
+    def filter(self, **criteria: str) -> list[int]:
+        """Return the rows matching every ``column=value`` criterion.
+
+        Only the dictionary-encoded columns can be filtered on.  Without
+        criteria every row matches.
+        """
+        rows = None
+        for column, value in criteria.items():
+            if column not in self._indexes:
+                raise KeyError(f"column {column!r} is not indexed")
+            matches = self._indexes[column].get(value, [])
+            rows = matches if rows is None else sorted(set(rows).intersection(matches))
+            if not rows:
+                return []
+        return list(range(self.rows)) if rows is None else list(rows)
+
+    def pair(self, row: int) -> Pair:
+        """Materialise ``row`` as a :class:`~tools.benchmark.Pair`."""
+        value = self.value
+        return Pair(
+            id=value("id", row),
+            domain=value("domain", row),
+            url=value("url", row),
+            bef_file=self.data_dir / value("bef_file", row),
+            aft_file=self.data_dir / value("aft_file", row),
+            libo=value("libo", row),
+            libn=value("libn", row),
+            apio=tuple(value("apio", row)),
+            apin=tuple(value("apin", row)),
+            api_imports=tuple(value("api_imports", row)),
+            filepath=value("filepath", row),
+            yaml=value("yaml", row),
+            descriptor=self.data_dir / f"{value('id', row)}.json",
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--store", type=Path, default=DEFAULT_STORE, help="store file")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    sub = parser.add_subparsers(dest="command", required=True)
+    sub.add_parser("build", help="(re)build the store from the descriptors")
+    find = sub.add_parser("query", help="list pairs matching all given filters")
+    for column in ENCODED_COLUMNS:
+        find.add_argument(f"--{column}")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        store = build_store(load_pairs(args.data))
+        save_store(store, args.store)
+        print(f"stored {store['rows']} pairs in {args.store}", file=sys.stderr)
+        return 0
+
+    try:
+        store = MetadataStore.load(args.store, args.data)
+    except FileNotFoundError:
+        parser.error(f"{args.store} not found, run 'build' first")
+    except ValueError as e:
+        parser.error(f"{args.store}: {e}")
+    criteria = {c: getattr(args, c) for c in ENCODED_COLUMNS if getattr(args, c) is not None}
+    for row in store.filter(**criteria):
+        print("\t".join(str(store.value(c, row)) for c in ("id", "domain", "libo", "libn")))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
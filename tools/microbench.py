@@ -0,0 +1,324 @@
+"""Micro-benchmarks of the old and the new library of migration pairs.
+
+Each case times one ``apio`` call with the old library against the matching
+``apin`` call with the new library on the same synthetic input.  Only pairs
+whose APIs can be exercised without external services are covered.  A side
+whose library is not installed is reported as skipped::
+
+    python -m tools.microbench
+    python -m tools.microbench --pairs 107 225 218 --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import io
+import json
+import sys
+import timeit
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable
+
+from .benchmark import DATA_DIR, load_pairs
+
+Setup = Callable[[], Callable[[], object]]
+
+_ADDRESSES = [f"10.{i // 256}.{i % 256}.{i % 200 + 1}" for i in range(256)]
+_NETWORK = "10.0.0.0/16"
+_RECORD = {
+    "id": 12345,
+    "name": "benchmark",
+    "tags": ["a", "b", "c"] * 10,
+    "values": list(range(100)),
+    "nested": {"x": 1.5, "y": None, "z": True},
+}
+_YAML = "\n".join(f"key{i}:\n  name: item{i}\n  values: [1, 2, 3]\n  flag: true" for i in range(50))
+_CSV = "".join(f"{i},name{i},{i * 1.5},\"quoted, text\"\r\n" for i in range(500))
+_INI = "\n".join(f"[section{i}]\nhost = example{i}.org\nport = {8000 + i}\ndebug = false" for i in range(50))
+_XML = "<root>" + "".join(f'<item id="{i}"><name>n{i}</name></item>' for i in range(200)) + "</root>"
+_HTML = "<p>Hello <b>world</b> <script>alert(1)</script> <a href='http://x'>link</a></p>" * 20
+_PEP8_SOURCE = "import os,sys\ndef f( a ,b ):\n    return a+b # comment\n" * 100
+_VERSIONS = [f"{i % 5}.{i % 7}.{i}" for i in range(100)]
+
+
+@dataclass(frozen=True)
+class Case:
+    """One timed comparison.
+
+    ``old`` and ``new`` import their library and return the callable that is
+    timed; importing happens outside of the measurement.
+    """
+
+    pair: str
+    api: str
+    old: Setup
+    new: Setup
+
+
+def _ipaddr():
+    import ipaddr
+
+    return lambda: [ipaddr.IPv4Address(a) in ipaddr.IPv4Network(_NETWORK) for a in _ADDRESSES]
+
+
+def _ipaddress():
+    import ipaddress
+
+    return lambda: [ipaddress.IPv4Address(a) in ipaddress.IPv4Network(_NETWORK) for a in _ADDRESSES]
+
+
+def _ipaddress_functions():
+    import ipaddress
+
+    return lambda: [
+        ipaddress.ip_address(a) in ipaddress.ip_interface(_NETWORK).network for a in _ADDRESSES
+    ]
+
+
+def _netaddr():
+    import netaddr
+
+    return lambda: [netaddr.IPAddress(a) in netaddr.IPNetwork(_NETWORK) for a in _ADDRESSES]
+
+
+def _msgpack():
+    import msgpack
+
+    return lambda: msgpack.loads(msgpack.dumps(_RECORD))
+
+
+def _umsgpack():
+    import umsgpack
+
+    return lambda: umsgpack.loads(umsgpack.dumps(_RECORD))
+
+
+def _ruamel():
+    from ruamel.yaml import YAML
+
+    yaml = YAML(typ="safe", pure=True)
+    return lambda: yaml.load(_YAML)
+
+
+def _pyyaml():
+    import yaml
+
+    return lambda: yaml.safe_load(_YAML)
+
+
+def _csv():
+    import csv
+
+    return lambda: list(csv.reader(io.StringIO(_CSV)))
+
+
+def _unicodecsv():
+    import unicodecsv
+
+    data = _CSV.encode()
+    return lambda: list(unicodecsv.reader(io.BytesIO(data)))
+
+
+def _attrs():
+    import attr
+
+    @attr.s
+    class Point:
+        x = attr.ib()
+        y = attr.ib(default=0)
+
+    return lambda: [Point(i, i) == Point(i, i) for i in range(200)]
+
+
+def _dataclasses():
+    import dataclasses
+
+    @dataclasses.dataclass
+    class Point:
+        x: int
+        y: int = 0
+
+    return lambda: [Point(i, i) == Point(i, i) for i in range(200)]
+
+
+def _checker(module_name: str) -> Setup:
+    def setup():
+        module = __import__(module_name)
+        lines = _PEP8_SOURCE.splitlines(True)
+        return lambda: module.Checker(lines=lines, quiet=True).check_all()
+
+    return setup
+
+
+def _bcrypt():
+    import bcrypt
+
+    return lambda: bcrypt.hashpw(b"password", bcrypt.gensalt(4))
+
+
+def _passlib():
+    from passlib.hash import bcrypt
+
+    # encrypt, the API the pair migrated to, is a deprecated alias of hash.
+    hasher = bcrypt.using(rounds=4)
+    return lambda: hasher.encrypt("password")
+
+
+def _semver():
+    import semver
+
+    return lambda: [semver.compare(a, b, True) for a, b in zip(_VERSIONS, _VERSIONS[1:])]
+
+
+def _semantic_version():
+    import semantic_version
+
+    return lambda: [semantic_version.compare(a, b) for a, b in zip(_VERSIONS, _VERSIONS[1:])]
+
+
+def _argparser(factory: Callable[[], object]):
+    parser = factory()
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=80)
+    parser.add_argument("-v", "--verbose", action="store_true")
+    return lambda: parser.parse_args(["--host", "example.org", "--port", "8080", "-v"])
+
+
+def _argparse():
+    import argparse
+
+    return _argparser(argparse.ArgumentParser)
+
+
+def _configargparse():
+    import configargparse
+
+    return _argparser(configargparse.ArgParser)
+
+
+def _configparser():
+    import configparser
+
+    def parse():
+        parser = configparser.ConfigParser()
+        parser.read_string(_INI)
+        return parser
+
+    return parse
+
+
+def _configobj():
+    import configobj
+
+    lines = _INI.splitlines()
+    return lambda: configobj.ConfigObj(lines)
+
+
+def _lxml():
+    from lxml import etree
+
+    data = _XML.encode()
+    return lambda: etree.parse(io.BytesIO(data)).findall("item")
+
+
+def _defusedxml():
+    from defusedxml import minidom
+
+    return lambda: minidom.parse(io.StringIO(_XML)).getElementsByTagName("item")
+
+
+def _html5lib():
+    import html5lib
+
+    return lambda: html5lib.parseFragment(_HTML)
+
+
+def _bleach():
+    import bleach
+
+    return lambda: bleach.clean(_HTML)
+
+
+CASES = [
+    Case("107", "IPv4Address/IPv4Network", _ipaddr, _ipaddress),
+    Case("125", "IPAddress/IPNetwork -> IPv4Address/IPv4Network", _netaddr, _ipaddress),
+    Case("154", "reader", _csv, _unicodecsv),
+    Case("176", "ConfigParser.read -> ConfigObj", _configparser, _configobj),
+    Case("193", "IPAddress/IPNetwork -> ip_address/ip_interface", _netaddr, _ipaddress_functions),
+    Case("197", "gensalt/hashpw -> encrypt", _bcrypt, _passlib),
+    Case("200", "Checker", _checker("pep8"), _checker("pycodestyle")),
+    Case("205", "parse/findall -> parse/getElementsByTagName", _lxml, _defusedxml),
+    Case("207", "parseFragment -> clean", _html5lib, _bleach),
+    Case("218", "load -> safe_load", _ruamel, _pyyaml),
+    Case("221", "ArgumentParser -> ArgParser", _argparse, _configargparse),
+    Case("225", "dumps/loads", _msgpack, _umsgpack),
+    Case("238", "s/ib -> dataclass", _attrs, _dataclasses),
+    Case("265", "compare", _semver, _semantic_version),
+    Case("283", "IPv4Address -> IPAddress", _ipaddr, _netaddr),
+]
+
+
+def _time(setup: Setup, repeat: int) -> tuple[float | None, str | None]:
+    """Return the best seconds per call of the callable built by ``setup``.
+
+    On failure the time is ``None`` and the reason is returned instead.
+    """
+    try:
+        func = setup()
+        timer = timeit.Timer(func)
+        number, _ = timer.autorange()
+        best = min(timer.repeat(repeat=repeat, number=number))
+    except ImportError as e:
+        return None, f"not installed: {e.name or e}"
+    except Exception as e:
+        return None, f"failed: {type(e).__name__}: {e}"
+    return best / number, None
+
+
+def run_case(case: Case, repeat: int = 3) -> dict:
+    """Time both sides of ``case``; sides that cannot run are ``None``."""
+    old, old_skip = _time(case.old, repeat)
+    new, new_skip = _time(case.new, repeat)
+    result = {"pair": case.pair, "api": case.api, "old_s": old, "new_s": new}
+    if old is not None and new is not None:
+        result["speedup"] = old / new
+    skipped = [reason for reason in (old_skip, new_skip) if reason]
+    if skipped:
+        result["skipped"] = skipped
+    return result
+
+
+def _fmt(seconds: float | None) -> str:
+    return "-" if seconds is None else f"{seconds * 1e6:10.1f}us"
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--pairs", nargs="+", metavar="N", help="only run cases of these pairs")
+    parser.add_argument("--data", type=Path, default=DATA_DIR, help="descriptor directory")
+    parser.add_argument("--repeat", type=int, default=3, help="measurements per side (best is kept)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON lines")
+    args = parser.parse_args(argv)
+
+    libraries = {p.id: (p.libo, p.libn) for p in load_pairs(args.data)}
+    for case in CASES:
+        if args.pairs and case.pair not in args.pairs:
+            continue
+        result = run_case(case, args.repeat)
+        libo, libn = libraries.get(case.pair, ("?", "?"))
+        if args.json:
+            print(json.dumps({**result, "libo": libo, "libn": libn}), flush=True)
+            continue
+        speedup = f"{result['speedup']:6.2f}x" if "speedup" in result else "      -"
+        note = "  (" + "; ".join(result["skipped"]) + ")" if "skipped" in result else ""
+        print(
+            f"{case.pair:>4} {libo} -> {libn} [{case.api}]: "
+            f"{_fmt(result['old_s'])} -> {_fmt(result['new_s'])} {speedup}{note}",
+            flush=True,
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())